@@ -1,9 +1,45 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, has_request_context
 from flask_cors import CORS
 import os
 import json
-from datetime import datetime, timedelta
+import gzip
+import hashlib
+import gc
+import time
+import threading
+import multiprocessing
+import base64
+import re
+import secrets
+from array import array
+from datetime import datetime, timedelta, timezone
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite as sqlite_dialect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+import sqlite3
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Módulos irmãos: relativos quando carregado como pacote (gunicorn backend.app:app, a partir da raiz),
+# diretos quando carregado de dentro de backend/ (python app.py, gunicorn app:app, run.py e scripts)
+if __package__:
+    from .question_bundle import QuestionBundle, bundle_path_for, encode_question, is_valid_question, question_text
+    from .metrics import MetricsRegistry
+    from .question_search import SearchIndex, snippet
+    from .question_order import shuffled_index, shuffled_position
+    from .question_sampling import question_weight, sample_stratified
+else:
+    from question_bundle import QuestionBundle, bundle_path_for, encode_question, is_valid_question, question_text
+    from metrics import MetricsRegistry
+    from question_search import SearchIndex, snippet
+    from question_order import shuffled_index, shuffled_position
+    from question_sampling import question_weight, sample_stratified
 
 # Configuração do diretório do projeto
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -69,21 +105,170 @@ AVAILABLE_EXAMS = {
     }
 }
 
-# Cache para questões carregadas
+# Diretório alternativo com os *_questoes.json (ex.: dados sintéticos do teste de carga)
+QUESTIONS_DIR_OVERRIDE = os.environ.get('STUDYHUB_QUESTIONS_DIR')
+
+# Cache das questões carregadas: exam_type -> entrada com a lista (ou bundle), o índice
+# por id_original_json, os payloads serializados, os enunciados em texto puro, as versões comprimidas
+# dos payloads e a versão (sha256) do arquivo.
+# Uma recarga monta uma entrada nova e troca a referência de uma vez; quem já pegou a
+# entrada antiga continua usando-a até terminar a requisição.
 QUESTIONS_CACHE = {}
-# Cache para contagem de questões
-QUESTION_COUNT_CACHE = {}
+QUESTIONS_RELOAD_LOCK = threading.Lock()
+# Montagem dos índices de busca: a thread de fundo e uma busca que chegue antes do fim não montam o mesmo índice duas vezes
+SEARCH_INDEX_LOCK = threading.Lock()
+
+# Intervalo mínimo (segundos) entre verificações de mudança nos arquivos de questões; negativo desliga
+RELOAD_CHECK_INTERVAL = float(os.environ.get('STUDYHUB_RELOAD_INTERVAL', '2'))
+
+# Compressão das respostas conforme o Accept-Encoding: brotli (se o pacote estiver instalado) ou gzip.
+# Respostas menores que COMPRESS_MIN_SIZE não compensam. Conteúdo imutável (questões, catálogo) é
+# comprimido uma vez só, no nível máximo; respostas dinâmicas usam um nível mais barato.
+COMPRESS_MIN_SIZE = int(os.environ.get('STUDYHUB_COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+STATIC_COMPRESS_LEVELS = {'br': 11, 'gzip': 9}
+DYNAMIC_COMPRESS_LEVELS = {'br': 4, 'gzip': 6}
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain')
+
+# Catálogo de exames serializado (e comprimido) para a versão atual: etag -> entrada
+CATALOG_CACHE = {}
+
+# Última questão vista por exame (índice, momento da visualização, momento do último flush,
+# momento da visualização pendente mais antiga), guardada fora do banco. Como só há uma sessão
+# de estudo em progresso por exame, é a posição dessa sessão. A memória é criada no import, antes
+# do fork dos workers do gunicorn, e por isso é compartilhada entre eles: qualquer worker enxerga
+# a posição mais recente.
+VIEW_POSITION_FIELDS = 4
+VIEW_POSITION_SLOTS = {exam_id: slot for slot, exam_id in enumerate(AVAILABLE_EXAMS)}
+VIEW_POSITION_BUFFER = multiprocessing.RawArray('d', len(AVAILABLE_EXAMS) * VIEW_POSITION_FIELDS)
+VIEW_POSITION_LOCK = multiprocessing.Lock()
+# Segundos que uma posição pode ficar pendente antes de a thread de flush gravá-la
+# (limita o que se perde se o processo morrer sem passar pelo worker_exit); negativo desliga
+VIEW_POSITION_FLUSH_INTERVAL = float(os.environ.get('STUDYHUB_VIEW_FLUSH_INTERVAL', '30'))
+
+# Pré-carregamento opcional de todos os exames no master do gunicorn (ver gunicorn.conf.py)
+PRELOAD_EXAMS = os.environ.get('STUDYHUB_PRELOAD_EXAMS', '0') == '1'
+WARMUP_STATE = {'status': 'pending' if PRELOAD_EXAMS else 'disabled'}
+
+# Cache HTTP por endpoint: questões sempre revalidam (o ETag evita o download),
+# catálogo e contagem podem ser reaproveitados por alguns minutos
+QUESTION_CACHE_CONTROL = 'public, no-cache'
+CATALOG_CACHE_CONTROL = 'public, max-age=300'
+COUNT_CACHE_CONTROL = 'public, max-age=300'
+
+# Máximo de questões por chamada de /api/questions (pré-carregamento no cliente)
+QUESTION_BATCH_MAX_LIMIT = 50
+QUESTION_BATCH_DEFAULT_LIMIT = 20
+
+# Máximo de respostas por chamada de /api/submit_answers
+SUBMIT_BATCH_MAX_SIZE = 200
+
+# Resultados por chamada de /api/search
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+# Revisão espaçada (SM-2): facilidade inicial e mínima, primeiros intervalos após acertos
+# seguidos e espera para rever uma questão errada
+REVIEW_INITIAL_EASE = 2.5
+REVIEW_MIN_EASE = 1.3
+REVIEW_EASE_PENALTY = 0.2
+REVIEW_FIRST_INTERVALS_DAYS = (1, 6)
+REVIEW_RELEARN_DELAY = timedelta(minutes=10)
+# Estados lidos por consulta em /api/review/next (pula questões que saíram do arquivo)
+REVIEW_CANDIDATE_BATCH = 10
+
+# Paginação de /api/study-sessions
+STUDY_SESSIONS_DEFAULT_LIMIT = 50
+STUDY_SESSIONS_MAX_LIMIT = 200
+
+# Paginação e ordenações de /api/exams/<id>/question-stats
+QUESTION_STATS_DEFAULT_LIMIT = 50
+QUESTION_STATS_MAX_LIMIT = 200
+QUESTION_STATS_SORTS = ('accuracy', 'attempts', 'correct', 'last_attempt')
+
+# Simulados (/api/mock-exam): padrão das provas associate da AWS (65 questões em 130 minutos) e
+# tolerância para respostas enviadas logo depois do fim do tempo
+MOCK_EXAM_DEFAULT_QUESTIONS = 65
+MOCK_EXAM_DEFAULT_MINUTES = 130
+MOCK_EXAM_GRACE_PERIOD = timedelta(seconds=30)
+
+# Perfil de SQL opcional (STUDYHUB_SQL_PROFILE=1): resumo por requisição com as consultas mais
+# lentas, alerta de N+1 quando o mesmo formato de consulta se repete N_PLUS_ONE_THRESHOLD vezes e
+# cabeçalho Server-Timing. O log de consultas lentas vale mesmo sem o perfil se
+# STUDYHUB_SLOW_QUERY_MS for definido (negativo desliga).
+SQL_PROFILE = os.environ.get('STUDYHUB_SQL_PROFILE', '0') == '1'
+SLOW_QUERY_MS = float(os.environ.get('STUDYHUB_SLOW_QUERY_MS', '100' if SQL_PROFILE else '-1'))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('STUDYHUB_N_PLUS_ONE_THRESHOLD', '5'))
+SQL_PROFILE_TOP_QUERIES = 3
 
 # Inicialização do Flask
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Habilita CORS para todas as rotas da API
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=['X-Next-Cursor', 'Server-Timing'])  # Habilita CORS para todas as rotas da API
 
 # Configuração do banco de dados
 instance_path_abs = os.path.join(PROJECT_ROOT, 'instance')
 if not os.path.exists(instance_path_abs):
     os.makedirs(instance_path_abs)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(instance_path_abs, 'studyhub.sqlite')
+def database_uri_from_env():
+    """URI do banco: DATABASE_URL (ex.: postgresql://...) ou o SQLite local em instance/"""
+    database_uri = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(instance_path_abs, 'studyhub.sqlite'))
+    # Provedores como Render/Heroku ainda entregam o esquema antigo postgres://; sem driver
+    # explícito, fixa o psycopg 3 (o padrão do SQLAlchemy varia entre versões)
+    for scheme in ('postgres://', 'postgresql://'):
+        if database_uri.startswith(scheme):
+            database_uri = 'postgresql+psycopg://' + database_uri[len(scheme):]
+    return database_uri
+
+def database_engine_options(database_uri):
+    """Opções do pool de conexões, ajustáveis por DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_PRE_PING e DATABASE_POOL_RECYCLE (segundos)"""
+    options = {
+        'pool_pre_ping': os.environ.get('DATABASE_POOL_PRE_PING', '1') == '1',
+        'pool_recycle': int(os.environ.get('DATABASE_POOL_RECYCLE', '1800'))
+    }
+    # O SQLite em memória usa um pool de conexão única, que não aceita tamanho
+    if not database_uri.startswith('sqlite'):
+        options['pool_size'] = int(os.environ.get('DATABASE_POOL_SIZE', '5'))
+        options['max_overflow'] = int(os.environ.get('DATABASE_MAX_OVERFLOW', '10'))
+    return options
+
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri_from_env()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Perfis de conexão do SQLite, aplicados como PRAGMA em cada conexão nova.
+# 'performance' usa WAL (leitores não bloqueiam o escritor), synchronous=NORMAL (fsync só no
+# checkpoint do WAL), mmap e cache maiores e espera de até 5 s quando o banco está ocupado.
+# Cada PRAGMA pode ser sobrescrito por STUDYHUB_SQLITE_<NOME>, ex.: STUDYHUB_SQLITE_MMAP_SIZE=0.
+SQLITE_PROFILES = {
+    'default': {
+        'busy_timeout': 5000
+    },
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negativo = KB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    }
+}
+SQLITE_PROFILE = os.environ.get('STUDYHUB_SQLITE_PROFILE', 'performance')
+SQLITE_PRAGMAS = dict(SQLITE_PROFILES.get(SQLITE_PROFILE, SQLITE_PROFILES['default']))
+for pragma_name in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store', 'busy_timeout'):
+    override = os.environ.get(f'STUDYHUB_SQLITE_{pragma_name.upper()}')
+    if override:
+        SQLITE_PRAGMAS[pragma_name] = override
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica o perfil SQLITE_PRAGMAS em cada conexão SQLite aberta pelo pool"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma_name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma_name}={value}")
+    cursor.close()
 app.secret_key = 'studyhub_secret_key'  # Chave fixa para sessões
 
 # Inicializa o banco de dados
@@ -99,8 +284,27 @@ class TestSession(db.Model):
     status = db.Column(db.String(50), nullable=False, default='in_progress') 
     last_question_idx_viewed = db.Column(db.Integer, nullable=True, default=0)
     exam_type = db.Column(db.String(100), nullable=True)
+    # Contadores mantidos a cada resposta registrada (ver submit_answer)
+    answered_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    correct_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # 'study' (sessão de estudo sequencial), 'wrong_answers' (revisão das questões erradas) ou 'mock_exam' (simulado)
+    session_type = db.Column(db.String(20), nullable=False, default='study', server_default='study')
+    # Lista fixa de questões (id_original_json) das sessões que não percorrem o exame inteiro
+    question_ids_json = db.Column(db.Text, nullable=True)
+    # Tempo de prova dos simulados; None = sem limite
+    time_limit_minutes = db.Column(db.Integer, nullable=True)
+    # Sessão de estudo em ordem embaralhada: só a semente (ver question_order.py); None = ordem do arquivo
+    shuffle_seed = db.Column(db.Integer, nullable=True)
     responses = db.relationship('UserResponse', backref='test_session', lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Sessão em progresso mais recente de um exame (filter_by status/exam_type + order_by timestamp)
+        db.Index('ix_test_session_status_exam_type_timestamp', 'status', 'exam_type', 'timestamp'),
+        # Histórico paginado por (timestamp, id), com ou sem filtro de exame
+        db.Index('ix_test_session_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_test_session_exam_type_timestamp_id', 'exam_type', 'timestamp', 'id'),
+    )
+
 class UserResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     test_session_id = db.Column(db.Integer, db.ForeignKey('test_session.id'), nullable=False)
@@ -109,38 +313,620 @@ class UserResponse(db.Model):
     is_correct = db.Column(db.Boolean, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Uma resposta por questão em cada sessão; também atende os filtros por (sessão, questão)
+        db.Index('uq_user_response_session_question', 'test_session_id', 'question_id_original', unique=True),
+        # Respostas de uma sessão em ordem cronológica (página de resultados)
+        db.Index('ix_user_response_session_timestamp', 'test_session_id', 'timestamp'),
+    )
+
+class ReviewState(db.Model):
+    """Agenda de revisão espaçada de uma questão, atualizada a cada resposta registrada (ver schedule_review)"""
+    id = db.Column(db.Integer, primary_key=True)
+    exam_type = db.Column(db.String(100), nullable=False)
+    question_id_original = db.Column(db.String(80), nullable=False)
+    ease = db.Column(db.Float, nullable=False, default=REVIEW_INITIAL_EASE)
+    interval_days = db.Column(db.Float, nullable=False, default=0)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)
+    lapses = db.Column(db.Integer, nullable=False, default=0)
+    due_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime, nullable=True)
+    # Resultado da tentativa mais recente (base da revisão das questões erradas)
+    last_answer_correct = db.Column(db.Boolean, nullable=True)
+
+    __table_args__ = (
+        db.Index('uq_review_state_exam_type_question', 'exam_type', 'question_id_original', unique=True),
+        db.Index('ix_review_state_exam_type_last_answer_correct', 'exam_type', 'last_answer_correct', 'question_id_original'),
+        # Fila de prioridade da revisão: a mais vencida do exame é a primeira entrada do índice
+        db.Index('ix_review_state_exam_type_due_at_id', 'exam_type', 'due_at', 'id'),
+    )
+
+class QuestionStats(db.Model):
+    """Tentativas e acertos por questão, somados a cada resposta registrada (ver record_question_stats)"""
+    id = db.Column(db.Integer, primary_key=True)
+    exam_type = db.Column(db.String(100), nullable=False)
+    question_id_original = db.Column(db.String(80), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    correct_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_attempt_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Alvo do upsert das respostas; também traz as estatísticas de um exame inteiro
+        db.Index('uq_question_stats_exam_type_question', 'exam_type', 'question_id_original', unique=True),
+    )
+
+# Acurácia de uma questão (ordenação padrão de /api/exams/<id>/question-stats). O índice abaixo usa a mesma
+# expressão e a mesma ordem de desempate da rota, então a primeira página sai do índice, sem ordenar.
+QUESTION_STATS_ACCURACY = QuestionStats.correct_count * 1.0 / QuestionStats.attempts
+db.Index('ix_question_stats_exam_type_accuracy', QuestionStats.exam_type, QUESTION_STATS_ACCURACY,
+         QuestionStats.attempts.desc(), QuestionStats.question_id_original)
+
+def upgrade_database_schema():
+    """Leva um banco já existente ao schema atual sem perder dados (create_all não altera tabelas existentes)"""
+    inspector = db.inspect(db.engine)
+    had_review_states = inspector.has_table(ReviewState.__tablename__)
+    had_question_stats = inspector.has_table(QuestionStats.__tablename__)
+    db.create_all()
+    
+    added_columns = add_missing_columns()
+    
+    # Respostas duplicadas impediriam o índice único: mantém a primeira de cada (sessão, questão).
+    # Vem antes dos recálculos abaixo, que devem contar só as respostas que ficam.
+    removed = db.session.execute(db.text(
+        "DELETE FROM user_response WHERE id NOT IN ("
+        "SELECT MIN(id) FROM user_response GROUP BY test_session_id, question_id_original)"
+    )).rowcount
+    db.session.commit()
+    
+    if removed or any(table == 'test_session' for table, _ in added_columns):
+        recompute_session_counters()
+    
+    # IF NOT EXISTS em vez de checkfirst: a inspeção do SQLite não enxerga índices de expressão
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+    
+    # Agenda de revisão nova (ou sem a coluna recém-adicionada): parte do histórico que já existe
+    if removed or not had_review_states or (ReviewState.__tablename__, 'last_answer_correct') in added_columns:
+        rebuild_review_states()
+    if removed or not had_question_stats:
+        rebuild_question_stats()
+    return removed
+
+def add_missing_columns():
+    """ALTER TABLE ADD COLUMN para colunas do modelo que ainda não existem no banco"""
+    inspector = db.inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}"
+            if column.server_default is not None:
+                # Literal entre aspas: vale para números e textos (ex.: session_type)
+                default = column.server_default.arg.replace("'", "''")
+                ddl += f" DEFAULT '{default}'"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            db.session.execute(db.text(ddl))
+            added.append((table.name, column.name))
+    db.session.commit()
+    return added
+
+def recompute_session_counters():
+    """Recalcula answered_count/correct_count de todas as sessões com um único GROUP BY"""
+    counts = db.session.execute(
+        db.select(
+            UserResponse.test_session_id,
+            db.func.count(UserResponse.id),
+            db.func.sum(db.case((UserResponse.is_correct, 1), else_=0))
+        ).group_by(UserResponse.test_session_id)
+    ).all()
+    
+    db.session.execute(db.update(TestSession).values(answered_count=0, correct_count=0))
+    if counts:
+        # UPDATE em lote pela chave primária
+        db.session.execute(db.update(TestSession), [
+            {'id': session_id, 'answered_count': answered, 'correct_count': correct or 0}
+            for session_id, answered, correct in counts
+        ])
+    db.session.commit()
+    return len(counts)
+
+def rebuild_review_states():
+    """Refaz a agenda de revisão repassando o histórico de respostas em ordem cronológica (migração ou reparo;
+    no dia a dia a agenda é atualizada a cada resposta, sem reler o histórico)"""
+    states = replay_review_history(TestSession.exam_type.isnot(None))
+    db.session.execute(db.delete(ReviewState))
+    if states:
+        db.session.execute(db.insert(ReviewState), [review_state_row(state) for state in states.values()])
+    db.session.commit()
+    return len(states)
+
+def replay_review_history(*conditions):
+    """Estados de revisão {(exam_type, question_id_original): ReviewState} obtidos repassando pelo SM-2,
+    em ordem cronológica, as respostas de user_response que atendem às condições"""
+    history = db.session.execute(
+        db.select(TestSession.exam_type, UserResponse.question_id_original, UserResponse.is_correct, UserResponse.timestamp)
+        .join(TestSession, UserResponse.test_session_id == TestSession.id)
+        .where(*conditions)
+        .order_by(UserResponse.timestamp, UserResponse.id)
+        .execution_options(yield_per=1000)
+    )
+    states = {}
+    for exam_type, question_id, is_correct, answered_at in history:
+        state = states.get((exam_type, question_id))
+        if state is None:
+            state = states[(exam_type, question_id)] = new_review_state(exam_type, question_id)
+        schedule_review(state, is_correct, answered_at or datetime.utcnow())
+    return states
+
+def rebuild_question_stats():
+    """Recalcula question_stats a partir de user_response com um único INSERT ... SELECT ... GROUP BY"""
+    db.session.execute(db.delete(QuestionStats))
+    inserted = db.session.execute(db.insert(QuestionStats).from_select(
+        ['exam_type', 'question_id_original', 'attempts', 'correct_count', 'last_attempt_at'],
+        db.select(
+            TestSession.exam_type,
+            UserResponse.question_id_original,
+            db.func.count(UserResponse.id),
+            db.func.sum(db.case((UserResponse.is_correct, 1), else_=0)),
+            db.func.max(UserResponse.timestamp)
+        )
+        .join(TestSession, UserResponse.test_session_id == TestSession.id)
+        .where(TestSession.exam_type.isnot(None))
+        .group_by(TestSession.exam_type, UserResponse.question_id_original)
+    )).rowcount
+    db.session.commit()
+    return inserted
+
 def load_questions_for_exam(exam_type):
     """Carrega questões para um tipo específico de exame"""
-    if exam_type in QUESTIONS_CACHE:
-        return QUESTIONS_CACHE[exam_type]
+    entry = get_exam_entry(exam_type)
+    return entry['questions'] if entry else []
+
+def get_exam_entry(exam_type):
+    """Entrada do cache do exame, carregando-a ou recarregando-a se o arquivo mudou"""
+    entry = QUESTIONS_CACHE.get(exam_type)
+    if entry is None:
+        if exam_type not in AVAILABLE_EXAMS:
+            return None
+        QUESTION_CACHE_MISSES.inc((exam_type,))
+        entry = load_exam_entry(exam_type)
+        if entry is not None:
+            QUESTIONS_CACHE[exam_type] = entry
+        return entry
     
-    if exam_type not in AVAILABLE_EXAMS:
-        return []
+    QUESTION_CACHE_HITS.inc((exam_type,))
+    if RELOAD_CHECK_INTERVAL >= 0 and time.monotonic() - entry['checked_at'] >= RELOAD_CHECK_INTERVAL:
+        return refresh_exam_entry(exam_type, entry)
+    return entry
+
+def load_exam_entry(exam_type):
+    """build_exam_entry com o tempo de carga e as falhas registrados nas métricas.
+    O índice de busca da entrada nova é montado logo em seguida, numa thread de fundo (no warm-up
+    ele é montado na hora, no master, para não deixar threads nem locks presos antes do fork)."""
+    started = time.perf_counter()
+    entry = build_exam_entry(exam_type)
+    QUESTION_CACHE_LOAD_SECONDS.observe((exam_type,), time.perf_counter() - started)
+    if entry is None:
+        QUESTION_CACHE_LOAD_FAILURES.inc((exam_type,))
+    elif WARMUP_STATE['status'] != 'running':
+        threading.Thread(target=build_search_index_in_background, args=(exam_type, entry),
+                         name=f'search-index-{exam_type}', daemon=True).start()
+    return entry
+
+def build_search_index_in_background(exam_type, entry):
+    try:
+        get_search_index(entry)
+    except Exception as e:
+        print(f"AVISO: Falha ao montar o índice de busca de {exam_type}: {e}")
+
+def refresh_exam_entry(exam_type, entry):
+    """Troca a entrada por uma nova se o JSON ou o bundle mudaram desde a carga"""
+    entry['checked_at'] = time.monotonic()
+    file_path = exam_file_path(exam_type)
+    if exam_source_signature(file_path) == entry['source_signature']:
+        return entry
     
-    file_path = os.path.join(PROJECT_ROOT, AVAILABLE_EXAMS[exam_type]['file'])
+    # Só uma thread recarrega; as outras seguem com a versão atual
+    if not QUESTIONS_RELOAD_LOCK.acquire(blocking=False):
+        return entry
+    try:
+        new_entry = load_exam_entry(exam_type)
+        if new_entry is None:
+            # Arquivo incompleto ou removido: mantém a versão antiga e tenta de novo depois
+            return entry
+        QUESTIONS_CACHE[exam_type] = new_entry
+        QUESTION_CACHE_RELOADS.inc((exam_type,))
+        print(f"SUCESSO: Questões de {exam_type} recarregadas (versão {new_entry['version'][:12]})")
+        return new_entry
+    finally:
+        QUESTIONS_RELOAD_LOCK.release()
+
+def exam_file_path(exam_type):
+    """Caminho do JSON de questões do exame, respeitando STUDYHUB_QUESTIONS_DIR"""
+    relative_path = AVAILABLE_EXAMS[exam_type]['file']
+    if QUESTIONS_DIR_OVERRIDE:
+        return os.path.join(QUESTIONS_DIR_OVERRIDE, os.path.basename(relative_path))
+    return os.path.join(PROJECT_ROOT, relative_path)
+
+def exam_source_signature(file_path):
+    """(mtime_ns, tamanho) do JSON e do bundle, usado para detectar mudanças sem ler os arquivos"""
+    signature = []
+    for path in (file_path, bundle_path_for(file_path)):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def build_exam_entry(exam_type):
+    """Lê o bundle (ou o JSON) do exame e monta uma entrada nova do cache; None em caso de erro"""
+    file_path = exam_file_path(exam_type)
+    # Assinatura tirada antes da leitura: uma escrita durante a carga dispara outra recarga
+    signature = exam_source_signature(file_path)
+    
+    # Prefere o bundle pré-compilado (scripts/build_question_bundles.py), decodificado sob demanda
+    bundle = load_question_bundle(exam_type, file_path)
+    if bundle is not None:
+        print(f"SUCESSO: Bundle com {len(bundle)} questões válidas mapeado para {exam_type}")
+        return {
+            'questions': bundle,
+            'position_by_id': build_question_index(bundle.ids),
+            'payloads': None,
+            'texts': None,
+            'search': None,
+            'strata': None,
+            'compressed': {},
+            'version': bundle.source_sha256,
+            'source_signature': signature,
+            'checked_at': time.monotonic()
+        }
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            all_questions = json.load(f)
-        
-        # Filtrar questões com erro
-        questions = [q for q in all_questions if 'error' not in q and len(q.get('opcoes', [])) > 0]
-        
-        QUESTIONS_CACHE[exam_type] = questions
-        print(f"SUCESSO: Carregadas {len(questions)} questões válidas para {exam_type} (de {len(all_questions)} totais)")
-        return questions
+        with open(file_path, 'rb') as f:
+            raw_source = f.read()
+        all_questions = json.loads(raw_source.decode('utf-8'))
     except FileNotFoundError:
         print(f"AVISO: Arquivo não encontrado para {exam_type}: {file_path}")
-        return []
-    except json.JSONDecodeError:
+        return None
+    except (json.JSONDecodeError, UnicodeDecodeError):
         print(f"AVISO: Erro ao decodificar JSON para {exam_type}")
-        return []
+        return None
+    
+    # Filtrar questões com erro
+    questions = [q for q in all_questions if is_valid_question(q)]
+    # O texto puro fica fora da questão, como no bundle (não vai no payload)
+    texts = [question_text(q) for q in questions]
+    for q in questions:
+        q.pop('enunciado_texto', None)
+    print(f"SUCESSO: Carregadas {len(questions)} questões válidas para {exam_type} (de {len(all_questions)} totais)")
+    return {
+        'questions': questions,
+        'position_by_id': build_question_index(q.get('id_original_json') for q in questions),
+        'payloads': [encode_question(q) for q in questions],
+        'texts': texts,
+        'search': None,
+        'strata': None,
+        'compressed': {},
+        'version': hashlib.sha256(raw_source).hexdigest(),
+        'source_signature': signature,
+        'checked_at': time.monotonic()
+    }
+
+def load_question_bundle(exam_type, file_path):
+    """Abre o bundle do exame se ele existir e estiver em dia com o JSON; senão retorna None"""
+    bundle_path = bundle_path_for(file_path)
+    if not os.path.exists(bundle_path):
+        return None
+    
+    try:
+        bundle = QuestionBundle(bundle_path)
+    except (OSError, ValueError) as e:
+        print(f"AVISO: Bundle ignorado para {exam_type}: {e}")
+        return None
+    
+    if not bundle.matches_source(file_path):
+        print(f"AVISO: Bundle desatualizado para {exam_type}, usando o JSON: {bundle_path}")
+        bundle.close()
+        return None
+    
+    return bundle
+
+def build_question_index(question_ids):
+    """Monta o índice id_original_json -> posição na lista de questões do exame"""
+    position_by_id = {}
+    for idx, question_id in enumerate(question_ids):
+        if question_id is None:
+            continue
+        # Mantém a primeira ocorrência, como a busca linear fazia
+        position_by_id.setdefault(str(question_id), idx)
+    return position_by_id
+
+def find_question_by_original_id(exam_type, question_id_original):
+    """Retorna (índice, questão) para um id_original_json, ou (None, None) se não existir"""
+    entry = get_exam_entry(exam_type)
+    if not entry or question_id_original is None:
+        return None, None
+    question_idx = entry['position_by_id'].get(str(question_id_original))
+    if question_idx is None:
+        return None, None
+    return question_idx, entry['questions'][question_idx]
+
+def get_question_payload(entry, question_idx):
+    """Bytes JSON da questão, prontos para ir direto na resposta"""
+    if entry['payloads'] is None:
+        return entry['questions'].raw(question_idx)
+    return entry['payloads'][question_idx]
+
+def get_question_text(entry, question_idx):
+    """Enunciado da questão em texto puro (campo enunciado_texto da normalização)"""
+    if entry['payloads'] is None:
+        return entry['questions'].text(question_idx)
+    return entry['texts'][question_idx]
+
+def get_search_index(entry):
+    """Índice de busca do exame, montado quando a entrada é carregada (em fundo, ou no warm-up) e
+    descartado com ela. Uma busca que chegue antes de a montagem terminar espera por ela."""
+    index = entry['search']
+    if index is not None:
+        return index
+    with SEARCH_INDEX_LOCK:
+        index = entry['search']
+        if index is None:
+            questions = entry['questions']
+            index = SearchIndex(
+                ' '.join([get_question_text(entry, idx)] + [option.get('texto', '') for option in questions[idx].get('opcoes', [])])
+                for idx in range(len(questions))
+            )
+            entry['search'] = index
+    return index
+
+def get_question_strata(entry):
+    """Índices das questões agrupados por num_answers_to_select, montados uma vez por entrada do cache"""
+    strata = entry['strata']
+    if strata is None:
+        strata = {}
+        questions = entry['questions']
+        for idx in range(len(questions)):
+            strata.setdefault(questions[idx].get('num_answers_to_select', 1), array('I')).append(idx)
+        entry['strata'] = strata
+    return strata
+
+def question_payload_response(entry, question_idx, etag=None):
+    """Monta a resposta com o payload pré-serializado, comprimido se o cliente aceitar"""
+    return precompressed_response(entry['compressed'], question_idx, get_question_payload(entry, question_idx), etag)
+
+def negotiate_encoding(size):
+    """Codificação preferida pelo cliente entre COMPRESS_ENCODINGS, ou None se não valer a pena"""
+    if size < COMPRESS_MIN_SIZE:
+        return None
+    return request.accept_encodings.best_match(COMPRESS_ENCODINGS)
+
+def compress_payload(payload, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(payload, quality=level)
+    return gzip.compress(payload, compresslevel=level, mtime=0)
+
+def precompressed_response(cache, key, payload, etag=None):
+    """Resposta para um conteúdo imutável; a versão comprimida fica em cache[(codificação, key)]"""
+    encoding = negotiate_encoding(len(payload))
+    if encoding:
+        compressed = cache.get((encoding, key))
+        if compressed is None:
+            compressed = compress_payload(payload, encoding, STATIC_COMPRESS_LEVELS[encoding])
+            cache[(encoding, key)] = compressed
+        response = app.response_class(compressed, mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+        # ETag forte precisa distinguir a representação comprimida
+        etag = etag and f'{etag}-{encoding}'
+    else:
+        response = app.response_class(payload, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if etag:
+        response.set_etag(etag)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Comprime as respostas montadas a cada requisição (resultados, histórico, lotes de questões)"""
+    if response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers \
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    payload = response.get_data()
+    encoding = negotiate_encoding(len(payload))
+    if encoding is None:
+        return response
+    response.set_data(compress_payload(payload, encoding, DYNAMIC_COMPRESS_LEVELS[encoding]))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+def get_exam_version(exam_type):
+    """Hash do conteúdo atual do exame, ou None se ele não puder ser carregado"""
+    entry = get_exam_entry(exam_type)
+    return entry['version'] if entry else None
+
+def not_modified_response(cache_control, *etags):
+    """Resposta 304 se o If-None-Match do cliente bater com algum dos ETags (ou com a versão
+    comprimida deles), senão None"""
+    for etag in etags:
+        if not etag:
+            continue
+        for candidate in (etag, *(f'{etag}-{encoding}' for encoding in COMPRESS_ENCODINGS)):
+            if request.if_none_match.contains(candidate):
+                response = app.response_class(status=304)
+                response.set_etag(candidate)
+                response.headers['Cache-Control'] = cache_control
+                response.vary.add('Accept-Encoding')
+                return response
+    return None
+
+def process_memory_stats():
+    """Memória do processo atual em KB (RSS, PSS e páginas privadas), lida do /proc"""
+    stats = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(':') in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    stats[parts[0].rstrip(':').lower() + '_kb'] = int(parts[1])
+    except OSError:
+        return None
+    return stats
+
+def warm_up_question_cache(freeze=False):
+    """Carrega todos os exames de AVAILABLE_EXAMS de uma vez (índices, versões, busca e estratos inclusive).
+    
+    Com freeze=True, chamado no master antes do fork: desliga o GC durante a carga e
+    congela os objetos com gc.freeze(), para que os workers compartilhem as páginas via
+    copy-on-write sem que o GC ou as contagens de referência as sujem.
+    """
+    WARMUP_STATE['status'] = 'running'
+    started = time.perf_counter()
+    if freeze:
+        gc.disable()
+    
+    loaded = 0
+    for exam_id in AVAILABLE_EXAMS:
+        entry = get_exam_entry(exam_id)
+        if entry is not None:
+            get_search_index(entry)
+            get_question_strata(entry)
+            loaded += 1
+    
+    if freeze:
+        gc.freeze()
+    
+    WARMUP_STATE.update({
+        'status': 'complete',
+        'exams_loaded': loaded,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'frozen': freeze,
+        'memory_after_warmup': process_memory_stats()
+    })
+    print(f"SUCESSO: Warm-up de {WARMUP_STATE['exams_loaded']} exames em {WARMUP_STATE['duration_ms']} ms")
+
+def record_view_position(exam_type, question_idx):
+    """Guarda a posição vista em memória; o banco é atualizado depois, em lote"""
+    slot = VIEW_POSITION_SLOTS.get(exam_type)
+    if slot is None:
+        return
+    base = slot * VIEW_POSITION_FIELDS
+    now = time.time()
+    with VIEW_POSITION_LOCK:
+        # Primeira visualização desde o último flush: marca desde quando a posição está pendente
+        if VIEW_POSITION_BUFFER[base + 1] <= VIEW_POSITION_BUFFER[base + 2]:
+            VIEW_POSITION_BUFFER[base + 3] = now
+        VIEW_POSITION_BUFFER[base] = question_idx
+        VIEW_POSITION_BUFFER[base + 1] = now
+
+def claim_due_view_positions():
+    """Exames com posição pendente há mais de VIEW_POSITION_FLUSH_INTERVAL. O prazo de cada um é
+    renovado aqui, para que só um worker faça o flush (os outros voltam a tentar no próximo intervalo)."""
+    now = time.time()
+    due = []
+    with VIEW_POSITION_LOCK:
+        for exam_type, slot in VIEW_POSITION_SLOTS.items():
+            base = slot * VIEW_POSITION_FIELDS
+            pending = VIEW_POSITION_BUFFER[base + 1] > VIEW_POSITION_BUFFER[base + 2]
+            if pending and now - VIEW_POSITION_BUFFER[base + 3] >= VIEW_POSITION_FLUSH_INTERVAL:
+                VIEW_POSITION_BUFFER[base + 3] = now
+                due.append(exam_type)
+    return due
+
+def run_view_position_flusher():
+    while True:
+        time.sleep(max(VIEW_POSITION_FLUSH_INTERVAL / 2, 0.5))
+        due = claim_due_view_positions()
+        if not due:
+            continue
+        try:
+            with app.app_context():
+                flush_view_positions(due)
+        except Exception as e:
+            print(f"AVISO: Falha ao gravar as posições de visualização pendentes: {e}")
+
+def start_view_position_flusher():
+    """Thread (uma por processo; no gunicorn, iniciada em cada worker depois do fork) que grava as posições
+    pendentes há mais de VIEW_POSITION_FLUSH_INTERVAL, mesmo sem novas requisições"""
+    if VIEW_POSITION_FLUSH_INTERVAL < 0:
+        return None
+    thread = threading.Thread(target=run_view_position_flusher, name='view-position-flusher', daemon=True)
+    thread.start()
+    return thread
+
+def apply_buffered_view_position(test_session, include_earlier_views=False):
+    """Copia para a sessão a posição pendente do exame, se ela for posterior à criação da sessão
+    (ou qualquer posição pendente, com include_earlier_views, para uma sessão recém-criada).
+    Não faz commit; retorna o momento da visualização aplicada (para marcar o flush) ou None."""
+    slot = VIEW_POSITION_SLOTS.get(test_session.exam_type)
+    # O buffer guarda a navegação pelo exame, que só vale para a sessão de estudo
+    if slot is None or test_session.session_type != 'study':
+        return None
+    with VIEW_POSITION_LOCK:
+        base = slot * VIEW_POSITION_FIELDS
+        question_idx, viewed_at, flushed_at = VIEW_POSITION_BUFFER[base:base + 3]
+    
+    # Visualizações anteriores à sessão pertencem a uma sessão já encerrada
+    session_started_at = test_session.timestamp.replace(tzinfo=timezone.utc).timestamp()
+    if viewed_at <= flushed_at or (viewed_at < session_started_at and not include_earlier_views):
+        return None
+    test_session.last_question_idx_viewed = int(question_idx)
+    return viewed_at
+
+def mark_view_position_flushed(exam_type, viewed_at):
+    """Registra que a posição vista até viewed_at já está no banco"""
+    slot = VIEW_POSITION_SLOTS.get(exam_type)
+    if slot is None or viewed_at is None:
+        return
+    with VIEW_POSITION_LOCK:
+        base = slot * VIEW_POSITION_FIELDS
+        VIEW_POSITION_BUFFER[base + 2] = max(VIEW_POSITION_BUFFER[base + 2], viewed_at)
+
+def flush_view_positions(exam_types=None):
+    """Grava no banco, num único commit, as posições pendentes das sessões em progresso"""
+    flushed = []
+    for exam_type in (exam_types or AVAILABLE_EXAMS):
+        slot = VIEW_POSITION_SLOTS.get(exam_type)
+        if slot is None:
+            continue
+        base = slot * VIEW_POSITION_FIELDS
+        if VIEW_POSITION_BUFFER[base + 1] <= VIEW_POSITION_BUFFER[base + 2]:
+            continue
+        viewed_at = apply_buffered_view_position(get_or_create_current_test_session(exam_type))
+        if viewed_at is not None:
+            flushed.append((exam_type, viewed_at))
+    
+    if flushed:
+        db.session.commit()
+        for exam_type, viewed_at in flushed:
+            mark_view_position_flushed(exam_type, viewed_at)
+    return len(flushed)
+
+def flush_view_position_to_session(test_session):
+    """Como flush_view_positions, mas numa sessão já carregada pela rota (sem buscá-la de novo)"""
+    viewed_at = apply_buffered_view_position(test_session)
+    if viewed_at is None:
+        return
+    # Posição igual à gravada: sem commit (que expiraria a sessão e forçaria recarregá-la)
+    if db.session.is_modified(test_session):
+        db.session.commit()
+    mark_view_position_flushed(test_session.exam_type, viewed_at)
 
 # Funções auxiliares
 def get_or_create_current_test_session(exam_type):
     current_test_session = TestSession.query.filter_by(
         status='in_progress', 
-        exam_type=exam_type
+        exam_type=exam_type,
+        session_type='study'
     ).order_by(db.desc(TestSession.timestamp)).first()
     
     if not current_test_session:
@@ -148,21 +934,70 @@ def get_or_create_current_test_session(exam_type):
             timestamp=datetime.utcnow(), 
             status='in_progress', 
             last_question_idx_viewed=0,
-            exam_type=exam_type
+            exam_type=exam_type,
+            session_type='study'
         )
         db.session.add(current_test_session)
+        # Questões vistas sem sessão em progresso pertencem à sessão que está sendo criada
+        viewed_at = apply_buffered_view_position(current_test_session, include_earlier_views=True)
         db.session.commit()
+        mark_view_position_flushed(exam_type, viewed_at)
     
     return current_test_session
 
+def get_target_test_session(exam_type, session_id):
+    """Sessão indicada por session_id (ex.: revisão das erradas) ou, sem ele, a sessão de estudo atual.
+    Retorna (sessão, None) ou (None, (mensagem, status))"""
+    if session_id is None:
+        return get_or_create_current_test_session(exam_type), None
+    is_id = isinstance(session_id, int) and not isinstance(session_id, bool)
+    test_session = db.session.get(TestSession, session_id) if is_id else None
+    if test_session is None or test_session.exam_type != exam_type:
+        return None, ("Sessão não encontrada.", 404)
+    if test_session.status != 'in_progress':
+        return None, ("Esta sessão já foi encerrada.", 409)
+    return test_session, None
+
+def session_time_is_up(test_session):
+    """Simulado com o tempo de prova (mais a tolerância) esgotado: não aceita mais respostas"""
+    deadline = session_deadline(test_session)
+    return deadline is not None and datetime.utcnow() > deadline + MOCK_EXAM_GRACE_PERIOD
+
+def session_question_ids(test_session):
+    """Questões de uma sessão com lista fixa, ou None para a sessão de estudo (o exame inteiro)"""
+    if test_session.question_ids_json is None:
+        return None
+    return set(json.loads(test_session.question_ids_json))
+
+def session_question_idx(test_session, position, total):
+    """Índice da questão na posição `position` da sessão (a própria posição fora do modo embaralhado)"""
+    if test_session.shuffle_seed is None:
+        return position
+    return shuffled_index(position, total, test_session.shuffle_seed)
+
+def session_position(test_session, question_idx, total):
+    """Inversa de session_question_idx; None se o índice não existe mais no exame"""
+    if question_idx is None or not 0 <= question_idx < total:
+        return None
+    if test_session.shuffle_seed is None:
+        return question_idx
+    return shuffled_position(question_idx, total, test_session.shuffle_seed)
+
+def session_order_fields(test_session):
+    """Campos de ordem das respostas de sessão: a semente e a última posição vista na ordem da sessão
+    (last_question_idx_viewed continua sendo o índice da questão no exame)"""
+    questions = load_questions_for_exam(test_session.exam_type)
+    return {
+        'shuffle_seed': test_session.shuffle_seed,
+        'last_position_viewed': session_position(test_session, test_session.last_question_idx_viewed or 0, len(questions))
+    }
+
 def finalize_session(session_id_to_finalize):
     test_session_obj = TestSession.query.get(session_id_to_finalize)
     if test_session_obj:
-        # Recalcula baseado apenas nas respostas do DB para esta sessão
-        responses_for_session = UserResponse.query.filter_by(test_session_id=session_id_to_finalize).all()
-        
-        total_answered_in_session = len(responses_for_session)
-        correct_in_session = sum(1 for r in responses_for_session if r.is_correct)
+        # Usa os contadores mantidos a cada resposta, sem carregar as respostas
+        total_answered_in_session = test_session_obj.answered_count
+        correct_in_session = test_session_obj.correct_count
 
         if total_answered_in_session > 0:
             score = (correct_in_session / total_answered_in_session) * 100
@@ -181,24 +1016,30 @@ def finalize_session(session_id_to_finalize):
 @app.route('/api/exams', methods=['GET'])
 def get_available_exams():
     """Retorna lista de simulados disponíveis"""
-    exams = []
-    for exam_id, exam_info in AVAILABLE_EXAMS.items():
-        # Usar cache para contagem
-        if exam_id in QUESTION_COUNT_CACHE:
-            count = QUESTION_COUNT_CACHE[exam_id]
-        else:
-            questions = load_questions_for_exam(exam_id)
-            count = len(questions)
-            QUESTION_COUNT_CACHE[exam_id] = count
-            
-        exams.append({
-            'id': exam_id,
-            'name': exam_info['name'],
-            'question_count': count
-        })
+    # O ETag do catálogo combina as versões de todos os exames
+    versions = [f"{exam_id}:{get_exam_version(exam_id)}" for exam_id in AVAILABLE_EXAMS]
+    etag = hashlib.sha256('|'.join(versions).encode('utf-8')).hexdigest()[:32]
+    
+    not_modified = not_modified_response(CATALOG_CACHE_CONTROL, etag)
+    if not_modified:
+        return not_modified
     
-    response = jsonify(exams)
-    response.headers['Cache-Control'] = 'public, max-age=3600'  # Cache por 1 hora
+    # Serializado e comprimido uma vez por versão do catálogo
+    catalog = CATALOG_CACHE.get(etag)
+    if catalog is None:
+        exams = []
+        for exam_id, exam_info in AVAILABLE_EXAMS.items():
+            exams.append({
+                'id': exam_id,
+                'name': exam_info['name'],
+                'question_count': len(load_questions_for_exam(exam_id))
+            })
+        catalog = {'payload': app.json.dumps(exams).encode('utf-8'), 'compressed': {}}
+        CATALOG_CACHE.clear()
+        CATALOG_CACHE[etag] = catalog
+    
+    response = precompressed_response(catalog['compressed'], 'catalog', catalog['payload'], etag)
+    response.headers['Cache-Control'] = CATALOG_CACHE_CONTROL
     return response
 
 @app.route('/api/questions/count', methods=['GET'])
@@ -207,87 +1048,143 @@ def get_questions_count():
     if not exam_type:
         return jsonify({"error": "exam_type é obrigatório"}), 400
     
-    # Usar cache para contagem
-    if exam_type in QUESTION_COUNT_CACHE:
-        return jsonify(QUESTION_COUNT_CACHE[exam_type])
+    entry = get_exam_entry(exam_type)
+    etag = f"{entry['version'][:32]}-count" if entry else None
+    not_modified = not_modified_response(COUNT_CACHE_CONTROL, etag)
+    if not_modified:
+        return not_modified
     
-    questions = load_questions_for_exam(exam_type)
-    count = len(questions)
-    QUESTION_COUNT_CACHE[exam_type] = count
-    return jsonify(count)
+    response = jsonify(len(entry['questions']) if entry else 0)
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = COUNT_CACHE_CONTROL
+    return response
 
 @app.route('/api/questions/<int:question_idx>', methods=['GET'])
 def get_question(question_idx):
     exam_type = request.args.get('exam_type')
     if not exam_type:
         return jsonify({"error": "exam_type é obrigatório"}), 400
-    questions = load_questions_for_exam(exam_type)
+    entry = get_exam_entry(exam_type)
     
-    if not (0 <= question_idx < len(questions)):
+    if not entry or not (0 <= question_idx < len(entry['questions'])):
         return jsonify({"error": "Índice de questão inválido"}), 404
     
-    question = questions[question_idx]
-    
-    current_test_session = get_or_create_current_test_session(exam_type)
-    current_test_session.last_question_idx_viewed = question_idx
-    db.session.commit()
+    # Leitura não toca no banco: a posição vista vai para o buffer e a revalidação não serializa nada
+    etag = f"{entry['version'][:32]}-{question_idx}"
+    record_view_position(exam_type, question_idx)
+    not_modified = not_modified_response(QUESTION_CACHE_CONTROL, etag)
+    if not_modified:
+        return not_modified
     
-    return jsonify(question)
-
-@app.route('/api/submit_answer', methods=['POST'])
-def submit_answer():
-    data = request.get_json()
-    if not data:
-        return jsonify({"success": False, "message": "Dados não recebidos."}), 400
+    response = question_payload_response(entry, question_idx, etag)
+    response.headers['Cache-Control'] = QUESTION_CACHE_CONTROL
+    return response
 
-    question_id_original = data.get('question_id_original')
-    user_choices_letters_list = data.get('chosen_letters')
-    exam_type = data.get('exam_type')
+@app.route('/api/questions', methods=['GET'])
+def get_questions_batch():
+    """Várias questões de uma vez (intervalo start/limit ou lista de ids), sem gravar nada no banco.
+    Com seed (a shuffle_seed da sessão), start/limit são posições na ordem embaralhada da sessão."""
+    exam_type = request.args.get('exam_type')
     if not exam_type:
-        return jsonify({"success": False, "message": "exam_type é obrigatório"}), 400
+        return jsonify({"error": "exam_type é obrigatório"}), 400
+    entry = get_exam_entry(exam_type)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    total = len(entry['questions'])
+    
+    ids_param = request.args.get('ids')
+    missing_ids = []
+    if ids_param:
+        requested_ids = [question_id.strip() for question_id in ids_param.split(',') if question_id.strip()]
+        if len(requested_ids) > QUESTION_BATCH_MAX_LIMIT:
+            return jsonify({"error": f"No máximo {QUESTION_BATCH_MAX_LIMIT} ids por chamada"}), 400
+        indices = []
+        for question_id in requested_ids:
+            question_idx = entry['position_by_id'].get(question_id)
+            if question_idx is None:
+                missing_ids.append(question_id)
+            else:
+                indices.append(question_idx)
+        etag_key = hashlib.sha256(','.join(requested_ids).encode('utf-8')).hexdigest()[:16]
+    else:
+        try:
+            start = int(request.args.get('start', 0))
+            limit = int(request.args.get('limit', QUESTION_BATCH_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({"error": "start e limit devem ser inteiros"}), 400
+        if start < 0 or not (1 <= limit <= QUESTION_BATCH_MAX_LIMIT):
+            return jsonify({"error": f"start deve ser >= 0 e limit entre 1 e {QUESTION_BATCH_MAX_LIMIT}"}), 400
+        positions = range(start, min(start + limit, total))
+        etag_key = f"{start}-{limit}"
+        seed_param = request.args.get('seed')
+        if seed_param is not None:
+            try:
+                seed = int(seed_param)
+            except ValueError:
+                return jsonify({"error": "seed deve ser um inteiro"}), 400
+            indices = [shuffled_index(position, total, seed) for position in positions]
+            etag_key += f"-s{seed}"
+        else:
+            indices = positions
+    
+    etag = f"{entry['version'][:32]}-batch-{etag_key}"
+    not_modified = not_modified_response(QUESTION_CACHE_CONTROL, etag)
+    if not_modified:
+        return not_modified
+    
+    # Monta o JSON juntando os payloads já serializados, sem decodificar as questões
+    items = b','.join(
+        b'{"idx":%d,"question":%s}' % (question_idx, get_question_payload(entry, question_idx))
+        for question_idx in indices
+    )
+    body = b'{"total":%d,"items":[%s],"missing_ids":%s}' % (
+        total, items, json.dumps(missing_ids).encode('utf-8')
+    )
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = QUESTION_CACHE_CONTROL
+    return response
 
-    current_test_session = get_or_create_current_test_session(exam_type)
-    questions = load_questions_for_exam(exam_type)
+def duplicate_answer_payload(previous_answers_json, previous_is_correct, question_data):
+    """Corpo da resposta 409 para uma questão que já foi respondida na sessão"""
+    previous_answers_list_for_json = []
+    if previous_answers_json:
+        try:
+            previous_answers_list_for_json = json.loads(previous_answers_json)
+        except:
+            previous_answers_list_for_json = [previous_answers_json]
+    
+    return {
+        "success": False,
+        "message": "Esta questão já foi respondida nesta sessão.",
+        "is_correct": previous_is_correct,
+        "correct_answer_was": question_data.get('resposta_sugerida_letra', ''),
+        "previous_user_answers": previous_answers_list_for_json
+    }
 
+def validate_answer(exam_type, question_id_original, user_choices_letters_list):
+    """Confere o formato da resposta e a questão. Retorna (questão, None, None) ou (None, mensagem, status)"""
     if not question_id_original or not user_choices_letters_list or not isinstance(user_choices_letters_list, list):
-        return jsonify({"success": False, "message": "Dados incompletos ou formato inválido para respostas."}), 400
+        return None, "Dados incompletos ou formato inválido para respostas.", 400
 
-    question_data = next((q for q in questions if str(q.get('id_original_json')) == str(question_id_original)), None)
+    _, question_data = find_question_by_original_id(exam_type, question_id_original)
 
     if not question_data:
-        return jsonify({"success": False, "message": f"Questão com ID original '{question_id_original}' não encontrada."}), 404
+        return None, f"Questão com ID original '{question_id_original}' não encontrada.", 404
 
     # Obter o número esperado de respostas para esta questão
     num_answers_expected_by_question = question_data.get('num_answers_to_select', 1)
 
     if len(user_choices_letters_list) != num_answers_expected_by_question:
-        return jsonify({"success": False, "message": f"Você deve selecionar {num_answers_expected_by_question} opção(ões)."}), 400
+        return None, f"Você deve selecionar {num_answers_expected_by_question} opção(ões).", 400
     
-    question_id_original_to_save = str(question_data.get('id_original_json'))
+    return question_data, None, None
 
-    # Verificar se já existe uma resposta para esta questão nesta sessão
-    existing_response = UserResponse.query.filter_by(
-        test_session_id=current_test_session.id,
-        question_id_original=question_id_original_to_save
-    ).first()
-    
-    if existing_response:
-        previous_answers_list_for_json = []
-        if existing_response.user_answers_letters_json:
-            try:
-                previous_answers_list_for_json = json.loads(existing_response.user_answers_letters_json)
-            except:
-                previous_answers_list_for_json = [existing_response.user_answers_letters_json] if existing_response.user_answers_letters_json else []
-        
-        return jsonify({
-            "success": False,
-            "message": "Esta questão já foi respondida nesta sessão.",
-            "is_correct": existing_response.is_correct,
-            "correct_answer_was": question_data.get('resposta_sugerida_letra', ''),
-            "previous_user_answers": previous_answers_list_for_json
-        }), 409
-
-    # Lógica de correção para múltiplas respostas
+def grade_answer(question_data, user_choices_letters_list):
+    """Lógica de correção para múltiplas respostas; retorna (acertou, resposta sugerida)"""
+    num_answers_expected_by_question = question_data.get('num_answers_to_select', 1)
     correct_suggested_answer_str = question_data.get('resposta_sugerida_letra', "")
     is_correct_answer = False
 
@@ -300,6 +1197,192 @@ def submit_answer():
            len(correct_letters_set) == num_answers_expected_by_question:
             is_correct_answer = True
 
+    return is_correct_answer, correct_suggested_answer_str
+
+def schedule_review(state, is_correct, reviewed_at):
+    """Passo do SM-2: acerto conta como nota 4 (facilidade mantida) e estica o intervalo; erro zera
+    a sequência, reduz a facilidade e traz a questão de volta em REVIEW_RELEARN_DELAY"""
+    if is_correct:
+        state.repetitions += 1
+        if state.repetitions <= len(REVIEW_FIRST_INTERVALS_DAYS):
+            state.interval_days = REVIEW_FIRST_INTERVALS_DAYS[state.repetitions - 1]
+        else:
+            state.interval_days = round(state.interval_days * state.ease, 2)
+        state.due_at = reviewed_at + timedelta(days=state.interval_days)
+    else:
+        state.repetitions = 0
+        state.lapses += 1
+        state.ease = max(REVIEW_MIN_EASE, round(state.ease - REVIEW_EASE_PENALTY, 2))
+        state.interval_days = 0
+        state.due_at = reviewed_at + REVIEW_RELEARN_DELAY
+    state.last_reviewed_at = reviewed_at
+    state.last_answer_correct = is_correct
+
+def record_reviews(exam_type, outcomes, reviewed_at=None):
+    """Atualiza a agenda de revisão das questões respondidas: outcomes é [(question_id_original, acertou)].
+    Uma consulta carrega os estados existentes; não faz commit (vai na transação das respostas).
+    Retorna os estados por question_id_original."""
+    if not outcomes:
+        return {}
+    reviewed_at = reviewed_at or datetime.utcnow()
+    states = {
+        state.question_id_original: state
+        for state in ReviewState.query.filter(
+            ReviewState.exam_type == exam_type,
+            ReviewState.question_id_original.in_({question_id for question_id, _ in outcomes})
+        )
+    }
+    new_states = []
+    for question_id, is_correct in outcomes:
+        state = states.get(question_id)
+        if state is None:
+            state = states[question_id] = new_review_state(exam_type, question_id)
+            new_states.append(state)
+        schedule_review(state, is_correct, reviewed_at)
+    if not new_states:
+        return states
+    
+    # INSERT em lote (pelo ORM o SQLite faria um INSERT ... RETURNING por linha). Se outra requisição
+    # inseriu a mesma questão no meio tempo, a linha dela fica e a resposta é reaplicada sobre ela
+    insert = upsert_insert(ReviewState)
+    inserted = set(db.session.execute(
+        insert.on_conflict_do_nothing(index_elements=['exam_type', 'question_id_original'])
+        .returning(ReviewState.question_id_original),
+        [review_state_row(state) for state in new_states]
+    ).scalars())
+    conflicted = {state.question_id_original for state in new_states} - inserted
+    if conflicted:
+        for state in ReviewState.query.filter(
+            ReviewState.exam_type == exam_type, ReviewState.question_id_original.in_(conflicted)
+        ):
+            states[state.question_id_original] = state
+        for question_id, is_correct in outcomes:
+            if question_id in conflicted:
+                schedule_review(states[question_id], is_correct, reviewed_at)
+    return states
+
+def new_review_state(exam_type, question_id):
+    """Estado de uma questão nunca respondida (fora da sessão do banco; ver review_state_row)"""
+    return ReviewState(exam_type=exam_type, question_id_original=question_id, ease=REVIEW_INITIAL_EASE,
+                       interval_days=0, repetitions=0, lapses=0)
+
+def review_state_row(state):
+    return {column.name: getattr(state, column.name) for column in ReviewState.__table__.columns if column.name != 'id'}
+
+def upsert_insert(model):
+    """INSERT com suporte a ON CONFLICT no dialeto do banco configurado (SQLite ou Postgres)"""
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite_dialect
+    return dialect.insert(model)
+
+def record_question_stats(exam_type, outcomes, answered_at=None):
+    """Soma as respostas às estatísticas das questões: outcomes é [(question_id_original, acertou)], sem repetir
+    questão. Um upsert em lote, sem consulta prévia; não faz commit (vai na transação das respostas)."""
+    if not outcomes:
+        return
+    answered_at = answered_at or datetime.utcnow()
+    insert = upsert_insert(QuestionStats)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=['exam_type', 'question_id_original'],
+            set_={
+                'attempts': QuestionStats.attempts + insert.excluded.attempts,
+                'correct_count': QuestionStats.correct_count + insert.excluded.correct_count,
+                'last_attempt_at': insert.excluded.last_attempt_at
+            }
+        ),
+        [{
+            'exam_type': exam_type,
+            'question_id_original': question_id,
+            'attempts': 1,
+            'correct_count': 1 if is_correct else 0,
+            'last_attempt_at': answered_at
+        } for question_id, is_correct in outcomes]
+    )
+
+def discount_session_from_question_stats(test_session):
+    """Tira das estatísticas as respostas de uma sessão que vai ser excluída; não faz commit.
+    last_attempt_at não é recalculado (rebuild-question-stats o acerta)."""
+    removed = db.session.execute(
+        db.select(
+            UserResponse.question_id_original,
+            db.func.count(UserResponse.id),
+            db.func.sum(db.case((UserResponse.is_correct, 1), else_=0))
+        ).where(UserResponse.test_session_id == test_session.id).group_by(UserResponse.question_id_original)
+    ).all()
+    if not removed or not test_session.exam_type:
+        return []
+    stats = QuestionStats.__table__
+    db.session.execute(
+        db.update(stats)
+        .where(stats.c.exam_type == test_session.exam_type, stats.c.question_id_original == db.bindparam('question_id'))
+        .values(attempts=stats.c.attempts - db.bindparam('removed_attempts'),
+                correct_count=stats.c.correct_count - db.bindparam('removed_correct')),
+        [{'question_id': question_id, 'removed_attempts': attempts, 'removed_correct': correct or 0}
+         for question_id, attempts, correct in removed]
+    )
+    db.session.execute(db.delete(stats).where(stats.c.exam_type == test_session.exam_type, stats.c.attempts <= 0))
+    return [question_id for question_id, _, _ in removed]
+
+def recompute_review_states_without_session(test_session, question_ids):
+    """Refaz a agenda de revisão das questões de uma sessão que vai ser excluída a partir das respostas que
+    sobram nas outras sessões (como rebuild_review_states, só para essas questões); não faz commit.
+    Questões sem outra resposta saem de review_state."""
+    if not question_ids or not test_session.exam_type:
+        return
+    states = replay_review_history(
+        TestSession.exam_type == test_session.exam_type,
+        UserResponse.question_id_original.in_(question_ids),
+        UserResponse.test_session_id != test_session.id
+    )
+    db.session.execute(db.delete(ReviewState).where(
+        ReviewState.exam_type == test_session.exam_type,
+        ReviewState.question_id_original.in_(question_ids)
+    ))
+    if states:
+        db.session.execute(db.insert(ReviewState), [review_state_row(state) for state in states.values()])
+
+def review_state_payload(state, question_idx):
+    return {
+        'idx': question_idx,
+        'question_id_original': state.question_id_original,
+        'due_at': state.due_at.isoformat(),
+        'interval_days': state.interval_days,
+        'ease': state.ease,
+        'repetitions': state.repetitions,
+        'lapses': state.lapses,
+        'last_reviewed_at': state.last_reviewed_at.isoformat() if state.last_reviewed_at else None
+    }
+
+@app.route('/api/submit_answer', methods=['POST'])
+def submit_answer():
+    data = request.get_json()
+    if not data:
+        return jsonify({"success": False, "message": "Dados não recebidos."}), 400
+
+    question_id_original = data.get('question_id_original')
+    user_choices_letters_list = data.get('chosen_letters')
+    exam_type = data.get('exam_type')
+    if not exam_type:
+        return jsonify({"success": False, "message": "exam_type é obrigatório"}), 400
+
+    current_test_session, session_error = get_target_test_session(exam_type, data.get('session_id'))
+    if session_error:
+        return jsonify({"success": False, "message": session_error[0]}), session_error[1]
+    if session_time_is_up(current_test_session):
+        return jsonify({"success": False, "message": "O tempo deste simulado acabou."}), 409
+
+    question_data, error_message, error_status = validate_answer(exam_type, question_id_original, user_choices_letters_list)
+    if error_message:
+        return jsonify({"success": False, "message": error_message}), error_status
+    
+    question_id_original_to_save = str(question_data.get('id_original_json'))
+    allowed_question_ids = session_question_ids(current_test_session)
+    if allowed_question_ids is not None and question_id_original_to_save not in allowed_question_ids:
+        return jsonify({"success": False, "message": "Questão fora desta sessão."}), 400
+    current_session_id = current_test_session.id
+
+    is_correct_answer, correct_suggested_answer_str = grade_answer(question_data, user_choices_letters_list)
+
     try:
         # Salva as respostas do usuário como uma string JSON de uma lista ordenada
         user_answers_json_str = json.dumps(sorted(user_choices_letters_list))
@@ -310,7 +1393,17 @@ def submit_answer():
             is_correct=is_correct_answer
         )
         db.session.add(new_response)
+        # Incremento feito pelo próprio banco, na mesma transação da resposta
+        TestSession.query.filter_by(id=current_session_id).update({
+            TestSession.answered_count: TestSession.answered_count + 1,
+            TestSession.correct_count: TestSession.correct_count + (1 if is_correct_answer else 0)
+        })
+        record_reviews(exam_type, [(question_id_original_to_save, is_correct_answer)])
+        record_question_stats(exam_type, [(question_id_original_to_save, is_correct_answer)])
+        # Aproveita o commit da resposta para gravar a posição vista pendente
+        viewed_at = apply_buffered_view_position(current_test_session)
         db.session.commit()
+        mark_view_position_flushed(exam_type, viewed_at)
         
         return jsonify({
             "success": True,
@@ -318,25 +1411,173 @@ def submit_answer():
             "is_correct": is_correct_answer,
             "correct_answer_was": correct_suggested_answer_str
         })
+    except IntegrityError:
+        # O índice único (sessão, questão) barra a segunda resposta sem consulta prévia
+        db.session.rollback()
+        existing_response = UserResponse.query.filter_by(
+            test_session_id=current_session_id,
+            question_id_original=question_id_original_to_save
+        ).first()
+        if existing_response is None:
+            # Outra restrição (ex.: agenda de revisão criada por uma requisição concorrente)
+            return jsonify({"success": False, "message": "Conflito ao salvar a resposta, tente novamente."}), 409
+        return jsonify(duplicate_answer_payload(
+            existing_response.user_answers_letters_json,
+            existing_response.is_correct,
+            question_data
+        )), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Erro ao salvar no banco de dados: {str(e)}"}), 500
 
+@app.route('/api/submit_answers', methods=['POST'])
+def submit_answers():
+    """Registra várias respostas numa única transação.
+    
+    Corpo: {"exam_type": ..., "answers": [{"question_id_original": ..., "chosen_letters": [...]}, ...]}
+    e, opcionalmente, "session_id" (como em /api/submit_answer; sem ele vale a sessão de estudo atual).
+    Cada item volta em "results", na mesma ordem, com o "status" que a rota /api/submit_answer
+    teria dado para ele (200, 400, 404 ou 409).
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"success": False, "message": "Dados não recebidos."}), 400
+    
+    exam_type = data.get('exam_type')
+    if not exam_type:
+        return jsonify({"success": False, "message": "exam_type é obrigatório"}), 400
+    answers = data.get('answers')
+    if not answers or not isinstance(answers, list):
+        return jsonify({"success": False, "message": "answers deve ser uma lista não vazia."}), 400
+    if len(answers) > SUBMIT_BATCH_MAX_SIZE:
+        return jsonify({"success": False, "message": f"No máximo {SUBMIT_BATCH_MAX_SIZE} respostas por chamada."}), 400
+    
+    current_test_session, session_error = get_target_test_session(exam_type, data.get('session_id'))
+    if session_error:
+        return jsonify({"success": False, "message": session_error[0]}), session_error[1]
+    if session_time_is_up(current_test_session):
+        return jsonify({"success": False, "message": "O tempo deste simulado acabou."}), 409
+    current_session_id = current_test_session.id
+    allowed_question_ids = session_question_ids(current_test_session)
+    
+    # Validação e correção em memória, pelo índice de questões
+    results = [None] * len(answers)
+    graded = {}
+    for position, item in enumerate(answers):
+        if not isinstance(item, dict):
+            item = {}
+        question_id_original = item.get('question_id_original')
+        user_choices_letters_list = item.get('chosen_letters')
+        question_data, error_message, error_status = validate_answer(exam_type, question_id_original, user_choices_letters_list)
+        if error_message:
+            results[position] = {"question_id_original": question_id_original, "status": error_status,
+                                 "success": False, "message": error_message}
+            continue
+        
+        question_id_original_to_save = str(question_data.get('id_original_json'))
+        if allowed_question_ids is not None and question_id_original_to_save not in allowed_question_ids:
+            results[position] = {"question_id_original": question_id_original_to_save, "status": 400,
+                                 "success": False, "message": "Questão fora desta sessão."}
+            continue
+        if question_id_original_to_save in graded:
+            # Mesma questão repetida no lote: vale a primeira, como em chamadas sucessivas
+            first = graded[question_id_original_to_save]
+            results[position] = {"question_id_original": question_id_original_to_save, "status": 409,
+                                 **duplicate_answer_payload(first['answers_json'], first['is_correct'], question_data)}
+            continue
+        
+        is_correct_answer, correct_suggested_answer_str = grade_answer(question_data, user_choices_letters_list)
+        graded[question_id_original_to_save] = {
+            'position': position,
+            'question_data': question_data,
+            'answers_json': json.dumps(sorted(user_choices_letters_list)),
+            'is_correct': is_correct_answer,
+            'correct_answer_was': correct_suggested_answer_str
+        }
+    
+    # Uma consulta para as já respondidas e um commit para todas as novas; se outra requisição
+    # gravar alguma delas no meio do caminho, o índice único acusa e o lote é refeito uma vez
+    for attempt in range(2):
+        existing = {}
+        if graded:
+            existing = {
+                response.question_id_original: response
+                for response in UserResponse.query.filter(
+                    UserResponse.test_session_id == current_session_id,
+                    UserResponse.question_id_original.in_(list(graded))
+                )
+            }
+        to_insert = {key: answer for key, answer in graded.items() if key not in existing}
+        
+        try:
+            if to_insert:
+                # INSERT em lote (executemany): pelo ORM o SQLite faria um INSERT ... RETURNING por linha
+                db.session.execute(db.insert(UserResponse), [
+                    {
+                        'test_session_id': current_session_id,
+                        'question_id_original': key,
+                        'user_answers_letters_json': answer['answers_json'],
+                        'is_correct': answer['is_correct']
+                    } for key, answer in to_insert.items()
+                ])
+                TestSession.query.filter_by(id=current_session_id).update({
+                    TestSession.answered_count: TestSession.answered_count + len(to_insert),
+                    TestSession.correct_count: TestSession.correct_count + sum(1 for answer in to_insert.values() if answer['is_correct'])
+                })
+                outcomes = [(key, answer['is_correct']) for key, answer in to_insert.items()]
+                record_reviews(exam_type, outcomes)
+                record_question_stats(exam_type, outcomes)
+            viewed_at = apply_buffered_view_position(current_test_session)
+            db.session.commit()
+            mark_view_position_flushed(exam_type, viewed_at)
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == 1:
+                return jsonify({"success": False, "message": "Conflito ao salvar as respostas, tente novamente."}), 409
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"success": False, "message": f"Erro ao salvar no banco de dados: {str(e)}"}), 500
+    
+    for key, answer in graded.items():
+        if key in existing:
+            previous = existing[key]
+            results[answer['position']] = {
+                "question_id_original": key, "status": 409,
+                **duplicate_answer_payload(previous.user_answers_letters_json, previous.is_correct, answer['question_data'])
+            }
+        else:
+            results[answer['position']] = {
+                "question_id_original": key, "status": 200,
+                "success": True,
+                "message": "Resposta registrada!",
+                "is_correct": answer['is_correct'],
+                "correct_answer_was": answer['correct_answer_was']
+            }
+    
+    return jsonify({
+        "success": all(result['status'] == 200 for result in results),
+        "results": results
+    })
+
 @app.route('/api/current-session', methods=['GET'])
 def get_current_session():
     exam_type = request.args.get('exam_type')
     if not exam_type:
         return jsonify({"error": "exam_type é obrigatório"}), 400
     current_session = get_or_create_current_test_session(exam_type)
+    flush_view_position_to_session(current_session)
     
-    if UserResponse.query.filter_by(test_session_id=current_session.id).count() > 0 or \
-       (current_session.last_question_idx_viewed is not None and current_session.last_question_idx_viewed > 0):
+    # Progresso medido na ordem da sessão: no modo embaralhado a primeira questão não é a de índice 0
+    order_fields = session_order_fields(current_session)
+    if current_session.answered_count > 0 or (order_fields['last_position_viewed'] or 0) > 0:
         return jsonify({
             'id': current_session.id,
             'timestamp': current_session.timestamp.isoformat(),
             'status': current_session.status,
             'last_question_idx_viewed': current_session.last_question_idx_viewed,
-            'exam_type': current_session.exam_type
+            'exam_type': current_session.exam_type,
+            **order_fields
         })
     
     return jsonify(None)
@@ -353,9 +1594,16 @@ def start_new_study():
     if not (0 <= start_question_idx < len(questions)):
         return jsonify({"error": "Índice de questão inválido"}), 400
     
-    existing_session = TestSession.query.filter_by(status='in_progress', exam_type=exam_type).first()
+    # Modo embaralhado: a sessão guarda só a semente; sem questão inicial escolhida, começa na posição 0
+    shuffle_seed = secrets.randbits(31) if data.get('shuffle') else None
+    if shuffle_seed is not None and 'start_question_idx' not in data:
+        start_question_idx = shuffled_index(0, len(questions), shuffle_seed)
+    
+    # A sessão que vai ser encerrada fica com a última posição vista
+    existing_session = TestSession.query.filter_by(status='in_progress', exam_type=exam_type, session_type='study').first()
     if existing_session:
-        if UserResponse.query.filter_by(test_session_id=existing_session.id).count() > 0:
+        flush_view_position_to_session(existing_session)
+        if existing_session.answered_count > 0:
             finalize_session(existing_session.id)
         else:
             existing_session.status = 'abandoned'
@@ -365,7 +1613,9 @@ def start_new_study():
         timestamp=datetime.utcnow(), 
         status='in_progress', 
         last_question_idx_viewed=start_question_idx,
-        exam_type=exam_type
+        exam_type=exam_type,
+        session_type='study',
+        shuffle_seed=shuffle_seed
     )
     db.session.add(new_session)
     db.session.commit()
@@ -375,7 +1625,8 @@ def start_new_study():
         'timestamp': new_session.timestamp.isoformat(),
         'status': new_session.status,
         'last_question_idx_viewed': new_session.last_question_idx_viewed,
-        'exam_type': new_session.exam_type
+        'exam_type': new_session.exam_type,
+        **session_order_fields(new_session)
     })
 
 @app.route('/api/resume-study', methods=['GET'])
@@ -384,13 +1635,15 @@ def resume_study():
     if not exam_type:
         return jsonify({"error": "exam_type é obrigatório"}), 400
     current_session = get_or_create_current_test_session(exam_type)
+    flush_view_position_to_session(current_session)
     
     return jsonify({
         'id': current_session.id,
         'timestamp': current_session.timestamp.isoformat(),
         'status': current_session.status,
         'last_question_idx_viewed': current_session.last_question_idx_viewed or 0,
-        'exam_type': current_session.exam_type
+        'exam_type': current_session.exam_type,
+        **session_order_fields(current_session)
     })
 
 @app.route('/api/finish-study', methods=['POST'])
@@ -399,7 +1652,10 @@ def finish_study():
     exam_type = data.get('exam_type') if data else None
     if not exam_type:
         return jsonify({"error": "exam_type é obrigatório"}), 400
-    current_session = get_or_create_current_test_session(exam_type)
+    current_session, session_error = get_target_test_session(exam_type, data.get('session_id'))
+    if session_error:
+        return jsonify({"error": session_error[0]}), session_error[1]
+    flush_view_position_to_session(current_session)
     
     if current_session.status == 'in_progress':
         finalized_session = finalize_session(current_session.id)
@@ -412,24 +1668,259 @@ def finish_study():
                 'score_percentage': finalized_session.score_percentage,
                 'total_questions_in_session': finalized_session.total_questions_in_session,
                 'correct_answers_in_session': finalized_session.correct_answers_in_session,
-                'exam_type': finalized_session.exam_type
+                'exam_type': finalized_session.exam_type,
+                'session_type': finalized_session.session_type
             })
     
     return jsonify({"error": "Nenhuma sessão em progresso para finalizar"}), 400
 
+def wrong_answer_questions(exam_type, entry):
+    """[(idx, question_id_original)] das questões cuja tentativa mais recente foi errada, na ordem do exame.
+    Uma consulta no índice (exam_type, last_answer_correct, question_id_original) de review_state, sem ler sessões."""
+    question_ids = db.session.execute(
+        db.select(ReviewState.question_id_original)
+        .where(ReviewState.exam_type == exam_type, ReviewState.last_answer_correct == db.false())
+    ).scalars()
+    position_by_id = entry['position_by_id']
+    return sorted((position_by_id[question_id], question_id) for question_id in question_ids if question_id in position_by_id)
+
+def session_deadline(test_session):
+    """Fim do tempo de prova da sessão, ou None se ela não tem limite"""
+    if test_session.time_limit_minutes is None:
+        return None
+    return test_session.timestamp + timedelta(minutes=test_session.time_limit_minutes)
+
+def question_list_session_payload(test_session, entry, answered_question_ids=()):
+    """Sessão com lista fixa (revisão, simulado) com as questões resolvidas pelo índice do exame
+    (idx null se a questão saiu do arquivo)"""
+    position_by_id = entry['position_by_id']
+    question_ids = json.loads(test_session.question_ids_json)
+    deadline = session_deadline(test_session)
+    return {
+        'id': test_session.id,
+        'timestamp': test_session.timestamp.isoformat(),
+        'status': test_session.status,
+        'exam_type': test_session.exam_type,
+        'session_type': test_session.session_type,
+        'time_limit_minutes': test_session.time_limit_minutes,
+        'expires_at': deadline.isoformat() if deadline else None,
+        'answered_count': test_session.answered_count,
+        'correct_count': test_session.correct_count,
+        'total': len(question_ids),
+        'items': [{
+            'idx': position_by_id.get(question_id),
+            'question_id_original': question_id,
+            'answered': question_id in answered_question_ids
+        } for question_id in question_ids]
+    }
+
+def get_current_list_session(exam_type, session_type):
+    return TestSession.query.filter_by(
+        status='in_progress',
+        exam_type=exam_type,
+        session_type=session_type
+    ).order_by(db.desc(TestSession.timestamp)).first()
+
+def current_list_session_response(session_type):
+    """GET de uma sessão com lista fixa em progresso (ou null), com as questões já respondidas marcadas"""
+    exam_type = request.args.get('exam_type')
+    if not exam_type:
+        return jsonify({"error": "exam_type é obrigatório"}), 400
+    entry = get_exam_entry(exam_type)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    
+    test_session = get_current_list_session(exam_type, session_type)
+    if not test_session:
+        return jsonify(None)
+    answered_question_ids = set(db.session.execute(
+        db.select(UserResponse.question_id_original).where(UserResponse.test_session_id == test_session.id)
+    ).scalars())
+    return jsonify(question_list_session_payload(test_session, entry, answered_question_ids))
+
+def start_question_list_session(exam_type, session_type, question_ids, time_limit_minutes=None):
+    """Grava uma sessão com a lista de questões, encerrando a sessão do mesmo tipo em progresso no exame"""
+    existing_session = get_current_list_session(exam_type, session_type)
+    if existing_session:
+        if existing_session.answered_count > 0:
+            finalize_session(existing_session.id)
+        else:
+            existing_session.status = 'abandoned'
+    
+    test_session = TestSession(
+        timestamp=datetime.utcnow(),
+        status='in_progress',
+        last_question_idx_viewed=0,
+        exam_type=exam_type,
+        session_type=session_type,
+        question_ids_json=json.dumps(question_ids),
+        time_limit_minutes=time_limit_minutes
+    )
+    db.session.add(test_session)
+    db.session.commit()
+    return test_session
+
+@app.route('/api/review-session', methods=['GET'])
+def get_review_session():
+    """Revisão das questões erradas em progresso no exame (ou null), com as questões já respondidas marcadas"""
+    return current_list_session_response('wrong_answers')
+
+@app.route('/api/review-session', methods=['POST'])
+def start_review_session():
+    """Abre uma revisão com as questões cuja última tentativa foi errada, encerrando a revisão anterior do exame.
+    
+    A lista fica gravada na sessão. As questões vêm de /api/questions?ids=... (que não mexe na posição
+    da sessão de estudo) e as respostas vão para /api/submit_answer com o session_id da revisão.
+    """
+    data = request.get_json(silent=True) or {}
+    exam_type = data.get('exam_type')
+    if not exam_type:
+        return jsonify({"error": "exam_type é obrigatório"}), 400
+    entry = get_exam_entry(exam_type)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    
+    questions = wrong_answer_questions(exam_type, entry)
+    if not questions:
+        return jsonify({"error": "Nenhuma questão com a última tentativa errada neste simulado"}), 400
+    
+    review_session = start_question_list_session(exam_type, 'wrong_answers', [question_id for _, question_id in questions])
+    return jsonify(question_list_session_payload(review_session, entry))
+
+def question_weights(exam_type, entry):
+    """{idx: peso} das questões já respondidas, lido de question_stats numa consulta (as outras valem como inéditas)"""
+    position_by_id = entry['position_by_id']
+    weights = {}
+    for question_id, attempts, correct_count in db.session.execute(
+        db.select(QuestionStats.question_id_original, QuestionStats.attempts, QuestionStats.correct_count)
+        .where(QuestionStats.exam_type == exam_type)
+    ):
+        question_idx = position_by_id.get(question_id)
+        if question_idx is not None:
+            weights[question_idx] = question_weight(attempts, correct_count)
+    return weights
+
+def question_ids_for_indices(entry, indices):
+    questions = entry['questions']
+    if entry['payloads'] is None:
+        return [str(questions.ids[idx]) for idx in indices]
+    return [str(questions[idx].get('id_original_json')) for idx in indices]
+
+@app.route('/api/mock-exam', methods=['GET'])
+def get_mock_exam():
+    """Simulado em progresso no exame (ou null), sempre com as mesmas questões sorteadas na criação"""
+    return current_list_session_response('mock_exam')
+
+@app.route('/api/mock-exam', methods=['POST'])
+def start_mock_exam():
+    """Sorteia um simulado de num_questions questões (padrão 65) com time_limit_minutes de prova (padrão 130;
+    0 ou null desliga o limite), encerrando o simulado anterior do exame.
+    
+    O sorteio mantém a proporção de questões de uma e de várias respostas do banco e favorece as inéditas e as
+    de menor acurácia (ver question_sampling.py). A lista fica gravada na sessão; as questões vêm de
+    /api/questions?ids=... e as respostas vão para /api/submit_answer com o session_id do simulado.
+    """
+    data = request.get_json(silent=True) or {}
+    exam_type = data.get('exam_type')
+    if not exam_type:
+        return jsonify({"error": "exam_type é obrigatório"}), 400
+    entry = get_exam_entry(exam_type)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    
+    total = len(entry['questions'])
+    num_questions = data.get('num_questions', MOCK_EXAM_DEFAULT_QUESTIONS)
+    time_limit_minutes = data.get('time_limit_minutes', MOCK_EXAM_DEFAULT_MINUTES)
+    # bool é subclasse de int: JSON true/false não vale como número
+    if isinstance(num_questions, bool) or not isinstance(num_questions, int) or not (1 <= num_questions <= total):
+        return jsonify({"error": f"num_questions deve ser um inteiro entre 1 e {total}"}), 400
+    if time_limit_minutes is not None and (
+            isinstance(time_limit_minutes, bool) or not isinstance(time_limit_minutes, int) or time_limit_minutes < 0):
+        return jsonify({"error": "time_limit_minutes deve ser um inteiro positivo"}), 400
+    time_limit_minutes = time_limit_minutes or None
+    
+    sampled = sample_stratified(get_question_strata(entry), question_weights(exam_type, entry), num_questions)
+    mock_exam = start_question_list_session(exam_type, 'mock_exam', question_ids_for_indices(entry, sampled), time_limit_minutes)
+    return jsonify(question_list_session_payload(mock_exam, entry))
+
+def encode_session_cursor(timestamp, session_id):
+    """Cursor opaco com a posição (timestamp, id) da última sessão de uma página"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{session_id}".encode('utf-8')).decode('ascii')
+
+def decode_session_cursor(cursor):
+    """(timestamp, id) de um cursor gerado por encode_session_cursor; ValueError se inválido"""
+    try:
+        timestamp_str, session_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp_str), int(session_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError("Cursor inválido") from e
+
 @app.route('/api/study-sessions', methods=['GET'])
 def get_study_sessions():
-    sessions = TestSession.query.order_by(db.desc(TestSession.timestamp)).all()
-    
-    return jsonify([{
-        'id': session.id,
-        'timestamp': session.timestamp.isoformat(),
-        'status': session.status,
-        'score_percentage': session.score_percentage,
-        'total_questions_in_session': session.total_questions_in_session,
-        'correct_answers_in_session': session.correct_answers_in_session,
-        'exam_type': session.exam_type
-    } for session in sessions])
+    """Histórico de sessões, mais recentes primeiro, paginado por cursor (keyset em timestamp + id).
+    
+    Parâmetros opcionais: exam_type, status, session_type, limit e cursor (valor do cabeçalho X-Next-Cursor
+    da página anterior). O cabeçalho só vem quando há mais páginas.
+    """
+    try:
+        limit = int(request.args.get('limit', STUDY_SESSIONS_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit deve ser um inteiro"}), 400
+    if not (1 <= limit <= STUDY_SESSIONS_MAX_LIMIT):
+        return jsonify({"error": f"limit deve estar entre 1 e {STUDY_SESSIONS_MAX_LIMIT}"}), 400
+    
+    # Só as colunas necessárias, sem montar objetos do ORM
+    query = db.select(
+        TestSession.id,
+        TestSession.timestamp,
+        TestSession.status,
+        TestSession.score_percentage,
+        TestSession.total_questions_in_session,
+        TestSession.correct_answers_in_session,
+        TestSession.exam_type,
+        TestSession.session_type
+    )
+    exam_type = request.args.get('exam_type')
+    if exam_type:
+        query = query.where(TestSession.exam_type == exam_type)
+    status = request.args.get('status')
+    if status:
+        query = query.where(TestSession.status == status)
+    session_type = request.args.get('session_type')
+    if session_type:
+        query = query.where(TestSession.session_type == session_type)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_timestamp, cursor_id = decode_session_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Cursor inválido"}), 400
+        query = query.where(db.or_(
+            TestSession.timestamp < cursor_timestamp,
+            db.and_(TestSession.timestamp == cursor_timestamp, TestSession.id < cursor_id)
+        ))
+    
+    # Uma linha a mais indica se existe próxima página
+    rows = db.session.execute(
+        query.order_by(db.desc(TestSession.timestamp), db.desc(TestSession.id)).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    response = jsonify([{
+        'id': row.id,
+        'timestamp': row.timestamp.isoformat(),
+        'status': row.status,
+        'score_percentage': row.score_percentage,
+        'total_questions_in_session': row.total_questions_in_session,
+        'correct_answers_in_session': row.correct_answers_in_session,
+        'exam_type': row.exam_type,
+        'session_type': row.session_type
+    } for row in rows])
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_session_cursor(rows[-1].timestamp, rows[-1].id)
+    return response
 
 @app.route('/api/results/session/<int:session_id>', methods=['GET'])
 def get_session_results(session_id):
@@ -437,25 +1928,20 @@ def get_session_results(session_id):
     responses = UserResponse.query.filter_by(test_session_id=session_id).order_by(UserResponse.timestamp).all()
     
     exam_type = session_obj.exam_type
-    questions = load_questions_for_exam(exam_type)
+    total_questions = len(load_questions_for_exam(exam_type))
+    # Posição de cada questão na ordem em que a sessão a apresentou (lista fixa, embaralhada ou do arquivo)
+    list_positions = None
+    if session_obj.question_ids_json is not None:
+        list_positions = {question_id: position for position, question_id in enumerate(json.loads(session_obj.question_ids_json))}
     
     results = []
-    questions_dict_by_id = {
-        str(q.get('id_original_json')): q for q in questions if q.get('id_original_json') is not None
-    }
     
     for resp in responses:
-        question_details = questions_dict_by_id.get(str(resp.question_id_original))
-        question_idx = None
-        
-        if question_details:
-            try:
-                question_idx = next(
-                    idx for idx, q_data in enumerate(questions) 
-                    if str(q_data.get('id_original_json')) == str(resp.question_id_original)
-                )
-            except StopIteration:
-                pass
+        question_idx, question_details = find_question_by_original_id(exam_type, resp.question_id_original)
+        if list_positions is not None:
+            position = list_positions.get(resp.question_id_original)
+        else:
+            position = session_position(session_obj, question_idx, total_questions)
         
         user_answers_display = "N/A"
         if resp.user_answers_letters_json:
@@ -470,6 +1956,7 @@ def get_session_results(session_id):
             "question_id": resp.question_id_original,
             "question_title": question_details.get('titulo_original', 'Título não encontrado') if question_details else f"Detalhes não carregados",
             "question_idx": question_idx,
+            "position": position,
             "user_answers": user_answers_display,
             "is_correct": resp.is_correct,
             "timestamp": resp.timestamp.isoformat()
@@ -483,15 +1970,230 @@ def get_session_results(session_id):
             'score_percentage': session_obj.score_percentage,
             'total_questions_in_session': session_obj.total_questions_in_session,
             'correct_answers_in_session': session_obj.correct_answers_in_session,
-            'exam_type': session_obj.exam_type
+            'exam_type': session_obj.exam_type,
+            'session_type': session_obj.session_type,
+            'shuffle_seed': session_obj.shuffle_seed
         },
         "results": results
     })
 
+def question_stats_filter(exam_type):
+    return (QuestionStats.exam_type == exam_type, QuestionStats.attempts > 0)
+
+def question_stats_page_query(exam_type, sort, order, start, limit):
+    """SELECT de uma página de /api/exams/<id>/question-stats (também conferido pelo check-query-plans)"""
+    sort_column = {
+        'accuracy': QUESTION_STATS_ACCURACY,
+        'attempts': QuestionStats.attempts,
+        'correct': QuestionStats.correct_count,
+        'last_attempt': QuestionStats.last_attempt_at
+    }[sort]
+    direction = db.asc if order == 'asc' else db.desc
+    # Empate: mais tentativas primeiro (acurácia mais confiável), depois o id para a paginação ser estável
+    return (
+        db.select(
+            QuestionStats.question_id_original,
+            QuestionStats.attempts,
+            QuestionStats.correct_count,
+            QuestionStats.last_attempt_at
+        )
+        .where(*question_stats_filter(exam_type))
+        .order_by(direction(sort_column), db.desc(QuestionStats.attempts), QuestionStats.question_id_original)
+        .offset(start).limit(limit)
+    )
+
+@app.route('/api/exams/<exam_id>/question-stats', methods=['GET'])
+def get_question_stats(exam_id):
+    """Estatísticas por questão do exame, ordenadas e paginadas (start/limit).
+    
+    sort: accuracy (padrão, as mais difíceis primeiro), attempts, correct ou last_attempt; order: asc ou
+    desc (padrão: asc para accuracy, desc para as outras). Só entram questões já respondidas; a leitura é
+    uma faixa do índice (exam_type, question_id_original), limitada ao tamanho do banco de questões.
+    """
+    entry = get_exam_entry(exam_id)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    
+    sort = request.args.get('sort', 'accuracy')
+    if sort not in QUESTION_STATS_SORTS:
+        return jsonify({"error": f"sort deve ser um de: {', '.join(QUESTION_STATS_SORTS)}"}), 400
+    order = request.args.get('order', 'asc' if sort == 'accuracy' else 'desc')
+    if order not in ('asc', 'desc'):
+        return jsonify({"error": "order deve ser asc ou desc"}), 400
+    try:
+        start = int(request.args.get('start', 0))
+        limit = int(request.args.get('limit', QUESTION_STATS_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "start e limit devem ser inteiros"}), 400
+    if start < 0 or not (1 <= limit <= QUESTION_STATS_MAX_LIMIT):
+        return jsonify({"error": f"start deve ser >= 0 e limit entre 1 e {QUESTION_STATS_MAX_LIMIT}"}), 400
+    
+    total = db.session.execute(
+        db.select(db.func.count()).select_from(QuestionStats).where(*question_stats_filter(exam_id))
+    ).scalar()
+    rows = db.session.execute(question_stats_page_query(exam_id, sort, order, start, limit)).all()
+    
+    position_by_id = entry['position_by_id']
+    return jsonify({
+        "exam_type": exam_id,
+        "sort": sort,
+        "order": order,
+        "start": start,
+        "total": total,
+        "items": [{
+            "idx": position_by_id.get(row.question_id_original),
+            "question_id_original": row.question_id_original,
+            "attempts": row.attempts,
+            "correct_count": row.correct_count,
+            "accuracy": round(row.correct_count / row.attempts, 4),
+            "last_attempt_at": row.last_attempt_at.isoformat() if row.last_attempt_at else None
+        } for row in rows]
+    })
+
+@app.route('/api/search', methods=['GET'])
+def search_questions():
+    """Busca por palavras-chave no enunciado e nas opções, num exame (exam_type) ou em todos"""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "q é obrigatório"}), 400
+    try:
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit deve ser um inteiro"}), 400
+    if not (1 <= limit <= SEARCH_MAX_LIMIT):
+        return jsonify({"error": f"limit deve estar entre 1 e {SEARCH_MAX_LIMIT}"}), 400
+    
+    exam_type = request.args.get('exam_type')
+    if exam_type and exam_type not in AVAILABLE_EXAMS:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+    
+    # Com a consulta terminando em espaço o usuário já fechou a última palavra: sem prefixo
+    prefix_last = not request.args.get('q', '').endswith(' ')
+    ranked = []
+    total = 0
+    for exam_id in ([exam_type] if exam_type else AVAILABLE_EXAMS):
+        entry = get_exam_entry(exam_id)
+        if entry is None:
+            continue
+        hits, exam_total = get_search_index(entry).search(query, limit, prefix_last)
+        total += exam_total
+        ranked.extend((score, exam_id, question_idx, entry) for score, question_idx in hits)
+    ranked.sort(key=lambda hit: -hit[0])
+    
+    results = []
+    for score, exam_id, question_idx, entry in ranked[:limit]:
+        question_id = entry['questions'].ids[question_idx] if entry['payloads'] is None \
+            else entry['questions'][question_idx].get('id_original_json')
+        results.append({
+            'exam_type': exam_id,
+            'idx': question_idx,
+            'id_original_json': question_id,
+            'score': round(score, 4),
+            'snippet': snippet(get_question_text(entry, question_idx), query)
+        })
+    return jsonify({"query": query, "total": total, "results": results})
+
+def no_review_due_response(exam_type, next_due_at):
+    return jsonify({
+        "exam_type": exam_type,
+        "review": None,
+        "question": None,
+        "next_due_at": next_due_at.isoformat() if next_due_at else None
+    })
+
+@app.route('/api/review/next', methods=['GET'])
+def get_next_review():
+    """Questão com a revisão mais vencida do exame, com o payload.
+
+    A fila é o índice (exam_type, due_at, id) de review_state: cada chamada lê só o começo dele,
+    sem percorrer o histórico de respostas. Sem nada vencido, review e question vêm null e
+    next_due_at diz quando a próxima vence. A questão sai da fila quando é respondida
+    (/api/review/answer ou /api/submit_answer), que a reagenda.
+    """
+    exam_type = request.args.get('exam_type')
+    if not exam_type:
+        return jsonify({"error": "exam_type é obrigatório"}), 400
+    entry = get_exam_entry(exam_type)
+    if not entry:
+        return jsonify({"error": "Simulado não encontrado"}), 404
+
+    now = datetime.utcnow()
+    last_state = None
+    while True:
+        query = ReviewState.query.filter(ReviewState.exam_type == exam_type)
+        if last_state is not None:
+            query = query.filter(db.or_(
+                ReviewState.due_at > last_state.due_at,
+                db.and_(ReviewState.due_at == last_state.due_at, ReviewState.id > last_state.id)
+            ))
+        candidates = query.order_by(ReviewState.due_at, ReviewState.id).limit(REVIEW_CANDIDATE_BATCH).all()
+        if not candidates:
+            return no_review_due_response(exam_type, None)
+
+        for state in candidates:
+            # Questões que saíram do arquivo ficam na tabela (podem voltar), mas não são servidas
+            question_idx = entry['position_by_id'].get(state.question_id_original)
+            if question_idx is None:
+                continue
+            if state.due_at > now:
+                return no_review_due_response(exam_type, state.due_at)
+            body = b'{"exam_type":%s,"review":%s,"question":%s,"next_due_at":null}' % (
+                json.dumps(exam_type).encode('utf-8'),
+                json.dumps(review_state_payload(state, question_idx)).encode('utf-8'),
+                get_question_payload(entry, question_idx)
+            )
+            return app.response_class(body, mimetype='application/json')
+        last_state = candidates[-1]
+
+@app.route('/api/review/answer', methods=['POST'])
+def submit_review_answer():
+    """Corrige uma resposta dada na revisão e reagenda a questão, sem registrá-la numa sessão de estudo"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"success": False, "message": "Dados não recebidos."}), 400
+    exam_type = data.get('exam_type')
+    if not exam_type:
+        return jsonify({"success": False, "message": "exam_type é obrigatório"}), 400
+
+    question_data, error_message, error_status = validate_answer(
+        exam_type, data.get('question_id_original'), data.get('chosen_letters'))
+    if error_message:
+        return jsonify({"success": False, "message": error_message}), error_status
+
+    question_id_original = str(question_data.get('id_original_json'))
+    is_correct_answer, correct_suggested_answer_str = grade_answer(question_data, data.get('chosen_letters'))
+    try:
+        state = record_reviews(exam_type, [(question_id_original, is_correct_answer)])[question_id_original]
+        review = review_state_payload(state, get_exam_entry(exam_type)['position_by_id'].get(question_id_original))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Conflito ao salvar a revisão, tente novamente."}), 409
+
+    return jsonify({
+        "success": True,
+        "is_correct": is_correct_answer,
+        "correct_answer_was": correct_suggested_answer_str,
+        "review": review
+    })
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Pronto quando o warm-up terminou (ou quando ele está desligado e o carregamento é sob demanda)"""
+    ready = WARMUP_STATE['status'] in ('complete', 'disabled')
+    return jsonify({
+        'ready': ready,
+        'warmup': WARMUP_STATE,
+        'pid': os.getpid(),
+        'memory': process_memory_stats()
+    }), 200 if ready else 503
+
 @app.route('/api/session/<int:session_id>', methods=['DELETE'])
 def delete_session(session_id):
     session_to_delete = TestSession.query.get_or_404(session_id)
     
+    question_ids = discount_session_from_question_stats(session_to_delete)
+    recompute_review_states_without_session(session_to_delete, question_ids)
     db.session.delete(session_to_delete)
     db.session.commit()
     
@@ -504,20 +2206,176 @@ def index():
         "endpoints": [
             "/api/exams",
             "/api/questions/count",
+            "/api/questions",
             "/api/questions/<question_idx>",
+            "/api/submit_answer",
+            "/api/submit_answers",
             "/api/current-session",
             "/api/start-new-study",
             "/api/resume-study",
             "/api/finish-study",
             "/api/study-sessions",
             "/api/results/session/<session_id>",
-            "/api/session/<session_id>"
+            "/api/session/<session_id>",
+            "/api/search",
+            "/api/review/next",
+            "/api/review/answer",
+            "/api/review-session",
+            "/api/mock-exam",
+            "/api/exams/<exam_id>/question-stats",
+            "/api/ready",
+            "/api/metrics"
         ]
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas de todos os workers no formato texto do Prometheus"""
+    return app.response_class(METRICS.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# Métricas (ver metrics.py). Declaradas depois das rotas porque as séries de cada rota são
+# fixadas aqui; a memória é alocada no import, antes do fork dos workers.
+METRICS = MetricsRegistry()
+METRIC_UNMATCHED_ROUTE = '<unmatched>'
+METRIC_STATUS_CODES = ('200', '201', '204', '304', '400', '404', '405', '409', '500', '503', 'other')
+METRIC_DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+METRIC_LOAD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRIC_ROUTE_METHODS = sorted({
+    (rule.rule, method) for rule in app.url_map.iter_rules() for method in rule.methods
+} | {(METRIC_UNMATCHED_ROUTE, method) for method in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS')})
+METRIC_EXAM_LABELS = [(exam_id,) for exam_id in AVAILABLE_EXAMS]
+
+HTTP_REQUEST_SECONDS = METRICS.histogram(
+    'studyhub_http_request_duration_seconds', 'Latência das requisições por rota.',
+    ('route', 'method'), METRIC_ROUTE_METHODS)
+HTTP_REQUESTS = METRICS.counter(
+    'studyhub_http_requests_total', 'Requisições por rota e status.',
+    ('route', 'method', 'code'),
+    [(route, method, code) for route, method in METRIC_ROUTE_METHODS for code in METRIC_STATUS_CODES])
+HTTP_REQUESTS_IN_FLIGHT = METRICS.gauge(
+    'studyhub_http_requests_in_flight', 'Requisições em andamento por rota.',
+    ('route', 'method'), METRIC_ROUTE_METHODS)
+HTTP_REQUEST_DB_SECONDS = METRICS.histogram(
+    'studyhub_http_request_db_seconds', 'Tempo gasto em consultas ao banco por requisição.',
+    ('route', 'method'), METRIC_ROUTE_METHODS, buckets=METRIC_DB_BUCKETS)
+DB_QUERIES = METRICS.counter(
+    'studyhub_db_queries_total', 'Consultas executadas no banco por rota.',
+    ('route', 'method'), METRIC_ROUTE_METHODS)
+QUESTION_CACHE_HITS = METRICS.counter(
+    'studyhub_question_cache_hits_total', 'Acessos ao QUESTIONS_CACHE com o exame já carregado.',
+    ('exam',), METRIC_EXAM_LABELS)
+QUESTION_CACHE_MISSES = METRICS.counter(
+    'studyhub_question_cache_misses_total', 'Acessos ao QUESTIONS_CACHE que precisaram carregar o exame.',
+    ('exam',), METRIC_EXAM_LABELS)
+QUESTION_CACHE_RELOADS = METRICS.counter(
+    'studyhub_question_cache_reloads_total', 'Recargas do exame após mudança no arquivo.',
+    ('exam',), METRIC_EXAM_LABELS)
+QUESTION_CACHE_LOAD_FAILURES = METRICS.counter(
+    'studyhub_question_cache_load_failures_total', 'Cargas do exame que falharam (arquivo ausente ou inválido).',
+    ('exam',), METRIC_EXAM_LABELS)
+QUESTION_CACHE_LOAD_SECONDS = METRICS.histogram(
+    'studyhub_question_cache_load_seconds', 'Tempo de carga de um exame (bundle ou JSON).',
+    ('exam',), METRIC_EXAM_LABELS, buckets=METRIC_LOAD_BUCKETS)
+METRICS.allocate()
+
+def metric_route_labels():
+    """(rota, método) da requisição atual, como declarados nas métricas"""
+    route = request.url_rule.rule if request.url_rule is not None else METRIC_UNMATCHED_ROUTE
+    return route, request.method
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.db_seconds = 0.0
+    g.db_queries = 0
+    g.sql_queries = []
+    HTTP_REQUESTS_IN_FLIGHT.inc(metric_route_labels())
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exception=None):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    labels = metric_route_labels()
+    status = str(g.pop('metrics_status', 500))
+    HTTP_REQUESTS_IN_FLIGHT.dec(labels)
+    HTTP_REQUEST_SECONDS.observe(labels, time.perf_counter() - started)
+    HTTP_REQUESTS.inc(labels + (status if status in METRIC_STATUS_CODES else 'other',))
+    HTTP_REQUEST_DB_SECONDS.observe(labels, g.db_seconds)
+    DB_QUERIES.inc(labels, g.db_queries)
+    if SQL_PROFILE:
+        report_sql_profile(f"{labels[1]} {labels[0]}", g.db_seconds, g.sql_queries)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    # Consultas fora de requisição (CLI, warm-up, flush no worker_exit) não entram nas métricas
+    if has_request_context() and 'db_seconds' in g:
+        g.db_seconds += elapsed
+        g.db_queries += 1
+        if SQL_PROFILE:
+            g.sql_queries.append((elapsed, statement))
+    if 0 <= SLOW_QUERY_MS <= elapsed * 1000:
+        where = f" em {request.method} {request.path}" if has_request_context() else ""
+        print(f"AVISO: Consulta lenta ({elapsed * 1000:.1f} ms){where}: "
+              f"{' '.join(statement.split())[:500]} {str(parameters)[:200]}")
+
+def statement_shape(statement):
+    """Formato da consulta sem espaços extras e com listas de parâmetros (IN) colapsadas"""
+    return re.sub(r'\?(?:\s*,\s*\?)+', '?...', ' '.join(statement.split()))
+
+def find_repeated_statements(queries, threshold=None):
+    """Formatos executados threshold vezes ou mais (padrão N+1): [(vezes, formato)]"""
+    threshold = threshold or N_PLUS_ONE_THRESHOLD
+    counts = {}
+    for _, statement in queries:
+        shape = statement_shape(statement)
+        counts[shape] = counts.get(shape, 0) + 1
+    return sorted(((count, shape) for shape, count in counts.items() if count >= threshold), reverse=True)
+
+def report_sql_profile(route, db_seconds, queries):
+    """Imprime o resumo do perfil de SQL de uma requisição"""
+    if not queries:
+        return
+    print(f"PERFIL SQL: {route} -> {len(queries)} consultas, {db_seconds * 1000:.2f} ms no banco")
+    for elapsed, statement in sorted(queries, key=lambda query: query[0], reverse=True)[:SQL_PROFILE_TOP_QUERIES]:
+        print(f"    {elapsed * 1000:8.2f} ms  {statement_shape(statement)[:300]}")
+    for count, shape in find_repeated_statements(queries):
+        print(f"AVISO: Possível N+1 em {route}: {count}x {shape[:300]}")
+
+@app.after_request
+def add_sql_profile_header(response):
+    if SQL_PROFILE and 'db_seconds' in g:
+        response.headers['Server-Timing'] = f'db;dur={g.db_seconds * 1000:.2f};desc="{g.db_queries} consultas"'
+    return response
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(exception_context):
+    # Consulta com erro não passa pelo after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5002))
     with app.app_context():
-        db.create_all()
-    app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
+        upgrade_database_schema()
+    if PRELOAD_EXAMS:
+        warm_up_question_cache()
+    start_view_position_flusher()
+    try:
+        app.run(debug=False, host='0.0.0.0', port=port)
+    finally:
+        with app.app_context():
+            flush_view_positions()
\ No newline at end of file
@@ -1,3 +1,5 @@
+import gc
+import importlib
 import os
 
 bind = f"0.0.0.0:{os.environ.get('PORT', 5002)}"
@@ -8,4 +10,38 @@ max_requests = 1000
 max_requests_jitter = 100
 timeout = 30
 keepalive = 2
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+
+def studyhub_app(server):
+    # Módulo carregado pelo gunicorn: app (a partir de backend/) ou backend.app (a partir da raiz,
+    # com -c backend/gunicorn.conf.py); importar "app" direto criaria uma segunda cópia do módulo
+    return importlib.import_module((server.app.app_uri or 'app').split(':')[0])
+
+
+def when_ready(server):
+    # O master leva o banco ao schema atual uma vez, antes do fork (como o `python app.py` faz);
+    # as conexões abertas aqui são descartadas para não serem herdadas pelos workers
+    studyhub = studyhub_app(server)
+    with studyhub.app.app_context():
+        studyhub.upgrade_database_schema()
+        studyhub.db.engine.dispose()
+
+    # Com STUDYHUB_PRELOAD_EXAMS=1 o master carrega todos os exames antes do fork
+    # e congela os objetos para que os workers compartilhem as páginas
+    if studyhub.PRELOAD_EXAMS:
+        studyhub.warm_up_question_cache(freeze=True)
+
+
+def post_fork(server, worker):
+    # O master fica com o GC desligado depois do warm-up; os workers religam
+    gc.enable()
+    # Threads não sobrevivem ao fork: cada worker inicia a sua thread de flush das posições vistas
+    studyhub_app(server).start_view_position_flusher()
+
+
+def worker_exit(server, worker):
+    # Grava no banco as posições de visualização ainda pendentes no buffer compartilhado
+    studyhub = studyhub_app(server)
+    with studyhub.app.app_context():
+        studyhub.flush_view_positions()
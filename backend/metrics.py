@@ -0,0 +1,188 @@
+"""
+Métricas no formato texto do Prometheus, somadas entre os workers do gunicorn.
+
+Os valores ficam num único multiprocessing.RawArray alocado no import do app, antes do fork
+(preload_app=True no gunicorn.conf.py), do mesmo jeito que o buffer de posições vistas: todos
+os workers, inclusive os reciclados por max_requests, escrevem na mesma memória e qualquer
+um deles responde /api/metrics com o total. Sem preload cada worker teria os seus próprios
+valores.
+
+Como a memória é de tamanho fixo, cada família declara de antemão todas as combinações de
+labels; combinações desconhecidas são ignoradas.
+"""
+import math
+import multiprocessing
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(value)
+
+
+class MetricFamily:
+    """Counter ou gauge: um valor por combinação de labels"""
+
+    kind = None
+
+    def __init__(self, registry, name, help_text, label_names, label_values):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.label_values = [tuple(str(v) for v in values) for values in label_values]
+        self.offsets = {}
+
+    def slots_per_series(self):
+        return 1
+
+    def _assign(self, start):
+        for values in self.label_values:
+            self.offsets[values] = start
+            start += self.slots_per_series()
+        return start
+
+    def _add(self, label_values, slot, amount):
+        offset = self.offsets.get(tuple(str(v) for v in label_values))
+        if offset is None or self.registry.buffer is None:
+            return
+        with self.registry.lock:
+            self.registry.buffer[offset + slot] += amount
+
+    def touched(self, values, snapshot):
+        """Séries com labels só aparecem depois de usadas, como nos clientes oficiais"""
+        offset = self.offsets[values]
+        return not self.label_names or any(snapshot[offset:offset + self.slots_per_series()])
+
+    def render(self, snapshot):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        for values in self.label_values:
+            if not self.touched(values, snapshot):
+                continue
+            lines.append(f'{self.name}{_format_labels(self.label_names, values)} '
+                         f'{_format_value(snapshot[self.offsets[values]])}')
+        return lines
+
+
+class Counter(MetricFamily):
+    kind = 'counter'
+
+    def inc(self, label_values=(), amount=1.0):
+        self._add(label_values, 0, amount)
+
+
+class Gauge(MetricFamily):
+    kind = 'gauge'
+
+    def inc(self, label_values=(), amount=1.0):
+        self._add(label_values, 0, amount)
+
+    def dec(self, label_values=(), amount=1.0):
+        self._add(label_values, 0, -amount)
+
+    def touched(self, values, snapshot):
+        # Um gauge que voltou a zero continua sendo informado
+        return True
+
+
+class Histogram(MetricFamily):
+    """Contagens por bucket (não cumulativas na memória), soma e total de observações"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, label_names, label_values, buckets):
+        super().__init__(registry, name, help_text, label_names, label_values)
+        self.buckets = tuple(sorted(buckets))
+
+    def slots_per_series(self):
+        # buckets + +Inf + soma + contagem
+        return len(self.buckets) + 3
+
+    def observe(self, label_values, value):
+        offset = self.offsets.get(tuple(str(v) for v in label_values))
+        if offset is None or self.registry.buffer is None:
+            return
+        bucket = len(self.buckets)
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                bucket = i
+                break
+        buffer = self.registry.buffer
+        with self.registry.lock:
+            buffer[offset + bucket] += 1
+            buffer[offset + len(self.buckets) + 1] += value
+            buffer[offset + len(self.buckets) + 2] += 1
+
+    def render(self, snapshot):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        for values in self.label_values:
+            if not self.touched(values, snapshot):
+                continue
+            offset = self.offsets[values]
+            cumulative = 0.0
+            for i, upper_bound in enumerate(self.buckets + (math.inf,)):
+                cumulative += snapshot[offset + i]
+                le = _format_value(upper_bound) if math.isinf(upper_bound) else repr(float(upper_bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, values, [("le", le)])} '
+                             f'{_format_value(cumulative)}')
+            labels = _format_labels(self.label_names, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(snapshot[offset + len(self.buckets) + 1])}')
+            lines.append(f'{self.name}_count{labels} {_format_value(snapshot[offset + len(self.buckets) + 2])}')
+        return lines
+
+
+class MetricsRegistry:
+    """Declara as famílias e depois aloca a memória compartilhada de todas de uma vez"""
+
+    def __init__(self):
+        self.families = []
+        self.buffer = None
+        self.lock = multiprocessing.Lock()
+
+    def _register(self, family):
+        if self.buffer is not None:
+            raise RuntimeError('Métricas já alocadas; declare as famílias antes de allocate()')
+        self.families.append(family)
+        return family
+
+    def counter(self, name, help_text, label_names=(), label_values=((),)):
+        return self._register(Counter(self, name, help_text, label_names, label_values))
+
+    def gauge(self, name, help_text, label_names=(), label_values=((),)):
+        return self._register(Gauge(self, name, help_text, label_names, label_values))
+
+    def histogram(self, name, help_text, label_names=(), label_values=((),), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, help_text, label_names, label_values, buckets))
+
+    def allocate(self):
+        """Cria a memória compartilhada; precisa rodar antes do fork dos workers"""
+        size = 0
+        for family in self.families:
+            size = family._assign(size)
+        self.buffer = multiprocessing.RawArray('d', max(size, 1))
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        if self.buffer is None:
+            return ''
+        with self.lock:
+            snapshot = self.buffer[:]
+        lines = []
+        for family in self.families:
+            lines.extend(family.render(snapshot))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,184 @@
+"""
+Formato binário compacto para os arquivos *_questoes.json.
+
+Layout do arquivo (inteiros little-endian):
+
+    cabeçalho   MAGIC(4) versão(u16) reservado(u16) quantidade(u32)
+                tamanho_origem(u64) mtime_ns_origem(u64) sha256_origem(32)
+    ids         tamanho(u32) + lista JSON com os id_original_json
+    offsets     (quantidade + 1) x u32, relativos ao início dos registros
+    offsets     (quantidade + 1) x u32 dos textos, relativos ao início dos textos
+    registros   JSON compacto (UTF-8) de cada questão, um após o outro
+    textos      enunciado em texto puro (UTF-8) de cada questão, um após o outro
+
+O backend mapeia o arquivo com mmap e só decodifica a questão pedida, então
+os workers compartilham as páginas pelo page cache do sistema operacional.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+if __package__:
+    from .question_html import html_to_text
+else:
+    from question_html import html_to_text
+
+MAGIC = b'SHQB'
+VERSION = 2
+BUNDLE_SUFFIX = '.qbundle'
+
+# Campos gerados offline que ficam no servidor e não vão no payload enviado ao cliente
+SERVER_ONLY_FIELDS = ('enunciado_texto',)
+
+_HEADER = struct.Struct('<4sHHIQQ32s')
+_U32 = struct.Struct('<I')
+
+
+def is_valid_question(question):
+    """Questões com erro de scraping ou sem opções não são servidas"""
+    return 'error' not in question and len(question.get('opcoes', [])) > 0
+
+
+def bundle_path_for(json_path):
+    """Caminho do bundle correspondente a um arquivo *_questoes.json"""
+    return os.path.splitext(json_path)[0] + BUNDLE_SUFFIX
+
+
+def encode_question(question):
+    """Serialização compacta do payload da questão (registros do bundle e respostas da API)"""
+    if any(field in question for field in SERVER_ONLY_FIELDS):
+        question = {key: value for key, value in question.items() if key not in SERVER_ONLY_FIELDS}
+    return json.dumps(question, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def question_text(question):
+    """Enunciado em texto puro: o enunciado_texto pré-calculado ou, se faltar, derivado do HTML"""
+    return question.get('enunciado_texto') or html_to_text(question.get('enunciado_html', ''))
+
+
+def write_bundle(json_path, bundle_path=None):
+    """Gera o bundle a partir do JSON processado. Retorna (questões válidas, totais)"""
+    bundle_path = bundle_path or bundle_path_for(json_path)
+
+    with open(json_path, 'rb') as f:
+        raw_source = f.read()
+    source_stat = os.stat(json_path)
+
+    all_questions = json.loads(raw_source.decode('utf-8'))
+    questions = [q for q in all_questions if is_valid_question(q)]
+
+    records = [encode_question(q) for q in questions]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    texts = [question_text(q).encode('utf-8') for q in questions]
+    text_offsets = [0]
+    for text in texts:
+        text_offsets.append(text_offsets[-1] + len(text))
+
+    ids_blob = json.dumps([
+        None if q.get('id_original_json') is None else str(q.get('id_original_json'))
+        for q in questions
+    ]).encode('utf-8')
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0, len(records),
+        source_stat.st_size, source_stat.st_mtime_ns,
+        hashlib.sha256(raw_source).digest()
+    )
+
+    # Escreve num arquivo temporário e troca atomicamente
+    tmp_path = bundle_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(_U32.pack(len(ids_blob)))
+        f.write(ids_blob)
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(struct.pack(f'<{len(text_offsets)}I', *text_offsets))
+        for record in records:
+            f.write(record)
+        for text in texts:
+            f.write(text)
+    os.replace(tmp_path, bundle_path)
+
+    return len(questions), len(all_questions)
+
+
+class QuestionBundle:
+    """Sequência somente leitura de questões sobre um bundle mapeado em memória"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, _, count, source_size, source_mtime_ns, source_sha256 = \
+                _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Bundle inválido ou de versão incompatível: {path}")
+
+            pos = _HEADER.size
+            (ids_len,) = _U32.unpack_from(self._mmap, pos)
+            pos += _U32.size
+            self.ids = json.loads(self._mmap[pos:pos + ids_len].decode('utf-8'))
+            pos += ids_len
+
+            self._offsets = struct.unpack_from(f'<{count + 1}I', self._mmap, pos)
+            pos += (count + 1) * _U32.size
+            self._text_offsets = struct.unpack_from(f'<{count + 1}I', self._mmap, pos)
+            self._records_start = pos + (count + 1) * _U32.size
+            self._texts_start = self._records_start + self._offsets[-1]
+        except Exception:
+            self._mmap.close()
+            raise
+
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        self.source_sha256 = source_sha256.hex()
+
+    def matches_source(self, json_path):
+        """Confere se o bundle foi gerado a partir da versão atual do JSON"""
+        try:
+            source_stat = os.stat(json_path)
+        except OSError:
+            # Sem o JSON de origem o bundle é a única fonte disponível
+            return True
+        return source_stat.st_size == self.source_size and source_stat.st_mtime_ns == self.source_mtime_ns
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, idx):
+        """Bytes JSON da questão, sem decodificar"""
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('índice de questão fora do bundle')
+        start = self._records_start + self._offsets[idx]
+        end = self._records_start + self._offsets[idx + 1]
+        return self._mmap[start:end]
+
+    def text(self, idx):
+        """Enunciado em texto puro da questão"""
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('índice de questão fora do bundle')
+        start = self._texts_start + self._text_offsets[idx]
+        end = self._texts_start + self._text_offsets[idx + 1]
+        return self._mmap[start:end].decode('utf-8')
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return json.loads(self.raw(idx).decode('utf-8'))
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def close(self):
+        self._mmap.close()
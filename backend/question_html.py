@@ -0,0 +1,205 @@
+"""
+Normalização do HTML dos enunciados (enunciado_html) vindos do scraping.
+
+O HTML salvo pelo scraper carrega a indentação da página original ("\\n\\t\\t\\t\\t..."),
+tags vazias e <span> sem atributos. normalize_html() devolve um HTML equivalente na
+renderização: espaços em branco colapsados, sem espaços junto de blocos e <br>, sem tags
+vazias e sem wrappers redundantes. O conteúdo de <pre> fica intacto. html_to_text() gera a
+versão em texto puro do enunciado (campo enunciado_texto).
+"""
+import html
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'div', 'dl', 'dd', 'dt', 'figure', 'footer', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td',
+    'tfoot', 'th', 'thead', 'tr', 'ul'
+}
+# Tags que não mudam nada na renderização quando vêm sem atributos
+UNWRAP_TAGS = {'span', 'font'}
+
+# Só espaços ASCII; &nbsp; (\xa0) é intencional e fica
+_WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+
+
+class _Element:
+    __slots__ = ('tag', 'attrs', 'children')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+
+
+class _TreeBuilder(HTMLParser):
+    """Monta uma árvore simples, tolerando tags sem fechamento"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element(None, [])
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = _Element(tag, attrs)
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].children.append(_Element(tag, attrs))
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def _parse(source):
+    builder = _TreeBuilder()
+    builder.feed(source)
+    builder.close()
+    return builder.root
+
+
+def _is_block(node):
+    return isinstance(node, _Element) and (node.tag in BLOCK_TAGS or node.tag == 'br')
+
+
+def _clean(element):
+    """Colapsa espaços, remove tags vazias e desembrulha wrappers; não entra em <pre>"""
+    children = []
+    for child in element.children:
+        if isinstance(child, str):
+            child = _WHITESPACE.sub(' ', child)
+            if children and isinstance(children[-1], str):
+                children[-1] += child
+            elif child:
+                children.append(child)
+            continue
+        if child.tag != 'pre':
+            _clean(child)
+        if child.tag in VOID_TAGS or child.tag == 'pre':
+            children.append(child)
+        elif not child.children:
+            # Tag vazia não aparece na renderização
+            continue
+        elif child.tag in UNWRAP_TAGS and not child.attrs:
+            children.extend(child.children)
+        else:
+            children.append(child)
+
+    # Espaço junto de bloco, de <br> ou da borda de um bloco não aparece na renderização
+    is_block_container = element.tag is None or element.tag in BLOCK_TAGS
+    for i, child in enumerate(children):
+        if not isinstance(child, str):
+            continue
+        # Textos que ficaram vizinhos depois de remover uma tag vazia
+        child = re.sub(' {2,}', ' ', child)
+        if (i == 0 and is_block_container) or (i > 0 and _is_block(children[i - 1])):
+            child = child.lstrip(' ')
+        if (i == len(children) - 1 and is_block_container) or (i + 1 < len(children) and _is_block(children[i + 1])):
+            child = child.rstrip(' ')
+        children[i] = child
+    children = [child for child in children if child != '']
+
+    # <br> sobrando no começo ou no fim de um bloco
+    if is_block_container:
+        while children and isinstance(children[0], _Element) and children[0].tag == 'br':
+            children.pop(0)
+        while children and isinstance(children[-1], _Element) and children[-1].tag == 'br':
+            children.pop()
+    element.children = children
+
+
+def _serialize(node, parts):
+    if isinstance(node, str):
+        parts.append(html.escape(node, quote=False))
+        return
+    if node.tag is not None:
+        attrs = ''.join(
+            f' {name}' if value is None else f' {name}="{html.escape(value, quote=True)}"'
+            for name, value in node.attrs
+        )
+        parts.append(f'<{node.tag}{attrs}{"/" if node.tag in VOID_TAGS else ""}>')
+    for child in node.children:
+        _serialize(child, parts)
+    if node.tag is not None and node.tag not in VOID_TAGS:
+        parts.append(f'</{node.tag}>')
+
+
+def normalize_html(source):
+    """HTML do enunciado sem espaços e tags supérfluos; idempotente"""
+    if not source:
+        return source
+    root = _parse(source)
+    _clean(root)
+    parts = []
+    _serialize(root, parts)
+    return ''.join(parts)
+
+
+def _collect_text(node, parts):
+    if isinstance(node, str):
+        parts.append(node)
+        return
+    if node.tag == 'pre':
+        parts.append(('pre', ''.join(_pre_text(child) for child in node.children)))
+        return
+    if node.tag == 'br':
+        parts.append('\n')
+        return
+    if node.tag == 'img':
+        alt = dict(node.attrs).get('alt')
+        if alt:
+            parts.append(f' {alt} ')
+        return
+    block = node.tag in BLOCK_TAGS
+    if block:
+        parts.append('\n')
+    for child in node.children:
+        _collect_text(child, parts)
+    if block:
+        parts.append('\n')
+
+
+def _pre_text(node):
+    if isinstance(node, str):
+        return node
+    return ''.join(_pre_text(child) for child in node.children)
+
+
+def html_to_text(source):
+    """Texto puro do enunciado: uma linha por parágrafo/<br>, espaços colapsados (exceto em <pre>)"""
+    if not source:
+        return ''
+    root = _parse(source)
+    parts = []
+    for child in root.children:
+        _collect_text(child, parts)
+
+    lines = []
+    pending = []
+
+    def flush_pending():
+        for line in ''.join(pending).split('\n'):
+            line = _WHITESPACE.sub(' ', line).strip()
+            if line:
+                lines.append(line)
+        pending.clear()
+
+    for part in parts:
+        if isinstance(part, tuple):
+            # Conteúdo de <pre> entra como está
+            flush_pending()
+            if part[1].strip():
+                lines.append(part[1].strip('\n').rstrip())
+        else:
+            pending.append(part)
+    flush_pending()
+    return '\n'.join(lines)
@@ -0,0 +1,63 @@
+"""
+Ordem embaralhada das sessões de estudo (TestSession.shuffle_seed).
+
+A sessão guarda só a semente: a posição na sessão vira índice da questão (e vice-versa) por
+uma permutação pseudoaleatória calculada sob demanda, sem lista de índices gravada. A
+permutação é uma rede de Feistel sobre o menor domínio de 2^(2k) valores que cobre o exame;
+valores fora do exame são reembaralhados até cair dentro ("cycle walking"), o que dá em média
+menos de 4 passos por posição. Mesmo tamanho e mesma semente dão sempre a mesma ordem.
+"""
+
+FEISTEL_ROUNDS = 4
+_MASK64 = (1 << 64) - 1
+
+
+def _round_function(value, seed, round_index, mask):
+    """Mistura de 64 bits (finalizador do splitmix64) de um meio bloco com a semente e a rodada"""
+    x = (value * 0x9E3779B97F4A7C15 + seed * 0xBF58476D1CE4E5B9 + round_index) & _MASK64
+    x ^= x >> 31
+    x = (x * 0x94D049BB133111EB) & _MASK64
+    x ^= x >> 29
+    return x & mask
+
+
+def _half_bits(size):
+    return max(1, ((size - 1).bit_length() + 1) // 2)
+
+
+def _encrypt(value, seed, half_bits, mask):
+    left, right = value >> half_bits, value & mask
+    for round_index in range(FEISTEL_ROUNDS):
+        left, right = right, left ^ _round_function(right, seed, round_index, mask)
+    return (left << half_bits) | right
+
+
+def _decrypt(value, seed, half_bits, mask):
+    left, right = value >> half_bits, value & mask
+    for round_index in reversed(range(FEISTEL_ROUNDS)):
+        left, right = right ^ _round_function(left, seed, round_index, mask), left
+    return (left << half_bits) | right
+
+
+def shuffled_index(position, size, seed):
+    """Índice da questão na posição `position` da ordem embaralhada de um exame com `size` questões"""
+    if not 0 <= position < size:
+        raise IndexError(position)
+    half_bits = _half_bits(size)
+    mask = (1 << half_bits) - 1
+    value = _encrypt(position, seed, half_bits, mask)
+    while value >= size:
+        value = _encrypt(value, seed, half_bits, mask)
+    return value
+
+
+def shuffled_position(index, size, seed):
+    """Inversa de shuffled_index: posição da questão `index` na ordem embaralhada"""
+    if not 0 <= index < size:
+        raise IndexError(index)
+    half_bits = _half_bits(size)
+    mask = (1 << half_bits) - 1
+    value = _decrypt(index, seed, half_bits, mask)
+    while value >= size:
+        value = _decrypt(value, seed, half_bits, mask)
+    return value
@@ -0,0 +1,51 @@
+"""
+Sorteio das questões de um simulado (/api/mock-exam).
+
+As questões são divididas em estratos pelo número de respostas a marcar (num_answers_to_select):
+o simulado mantém a mesma proporção de questões de uma e de várias respostas do banco. Dentro de
+cada estrato o sorteio é ponderado e sem reposição (Efraimidis-Spirakis: chave u^(1/peso), ficam as
+k maiores), com peso maior para questões nunca respondidas e para as de menor acurácia.
+"""
+import heapq
+import random
+
+# Peso de uma questão nunca respondida; as respondidas vão de WEIGHT_MASTERED (sempre acertada)
+# a WEIGHT_MASTERED + WEIGHT_PER_ERROR_RATE (sempre errada)
+WEIGHT_UNSEEN = 3.0
+WEIGHT_MASTERED = 0.5
+WEIGHT_PER_ERROR_RATE = 2.5
+
+
+def question_weight(attempts, correct_count):
+    if not attempts:
+        return WEIGHT_UNSEEN
+    return WEIGHT_MASTERED + WEIGHT_PER_ERROR_RATE * (1 - correct_count / attempts)
+
+
+def stratum_quotas(sizes, num_questions):
+    """Quantas questões sortear de cada estrato, proporcional ao tamanho (maiores restos)"""
+    total = sum(sizes.values())
+    exact = {key: num_questions * size / total for key, size in sizes.items()}
+    quotas = {key: int(value) for key, value in exact.items()}
+    remaining = num_questions - sum(quotas.values())
+    for key in sorted(exact, key=lambda key: exact[key] - quotas[key], reverse=True)[:remaining]:
+        quotas[key] += 1
+    return quotas
+
+
+def sample_stratified(strata, weights, num_questions, rng=random):
+    """Sorteia num_questions índices (no máximo o total de strata), embaralhados entre os estratos.
+
+    strata: {chave: sequência de índices}; weights: {índice: peso}, sem a chave vale WEIGHT_UNSEEN.
+    """
+    quotas = stratum_quotas({key: len(indices) for key, indices in strata.items()}, num_questions)
+    sampled = []
+    for key, indices in strata.items():
+        if not quotas[key]:
+            continue
+        sampled.extend(heapq.nlargest(
+            quotas[key], indices,
+            key=lambda idx: rng.random() ** (1.0 / weights.get(idx, WEIGHT_UNSEEN))
+        ))
+    rng.shuffle(sampled)
+    return sampled
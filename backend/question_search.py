@@ -0,0 +1,166 @@
+"""
+Índice invertido em memória para a busca de questões (/api/search).
+
+Cada exame tem o seu índice, guardado na entrada do QUESTIONS_CACHE: uma recarga do
+exame descarta o índice junto. Os termos vêm do enunciado em texto puro e do texto
+das opções, em minúsculas e sem acentos ("configuração" e "configuracao" batem). O
+ranking é BM25; o último termo da consulta (ou um termo sem correspondência exata)
+também casa por prefixo ("fire" encontra "firehose").
+"""
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Prefixos mais curtos que isso casariam com boa parte do vocabulário
+MIN_PREFIX_LENGTH = 3
+# Máximo de termos considerados na expansão de um prefixo (os mais frequentes)
+MAX_PREFIX_EXPANSIONS = 40
+
+# Palavras muito comuns em inglês e português que só incham as listas de documentos
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were which with
+o os as um uma uns umas e de da das do dos em no na nos nas por para com que se ao aos
+""".split())
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Minúsculas e sem acentos (decomposição NFKD sem as marcas combinantes)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(fold(text)) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Índice BM25 de um exame; documentos são as posições das questões no exame"""
+
+    def __init__(self, documents):
+        """documents: iterável de textos, na ordem das questões"""
+        postings = {}
+        self.doc_lengths = array('I')
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, frequency in frequencies.items():
+                postings.setdefault(token, []).append((doc_id, frequency))
+
+        # Listas compactas: ids dos documentos e frequências em arrays paralelos
+        self.postings = {
+            term: (array('I', (doc_id for doc_id, _ in docs)), array('H', (min(freq, 65535) for _, freq in docs)))
+            for term, docs in postings.items()
+        }
+        self.terms = sorted(self.postings)
+        self.num_docs = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+
+    def __len__(self):
+        return self.num_docs
+
+    def _idf(self, term):
+        doc_freq = len(self.postings[term][0])
+        return math.log(1 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _expand(self, token, allow_prefix):
+        """Termos do vocabulário que casam com o token da consulta"""
+        if not allow_prefix or len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.postings else []
+        matches = []
+        position = bisect_left(self.terms, token)
+        while position < len(self.terms) and self.terms[position].startswith(token):
+            matches.append(self.terms[position])
+            position += 1
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches.sort(key=lambda term: len(self.postings[term][0]), reverse=True)
+            matches = matches[:MAX_PREFIX_EXPANSIONS]
+            if token in self.postings and token not in matches:
+                matches.append(token)
+        return matches
+
+    def _score_token(self, terms):
+        """Pontuação BM25 de um token da consulta por documento (o melhor entre os termos expandidos)"""
+        scores = {}
+        doc_lengths = self.doc_lengths
+        length_norm = BM25_K1 * (1 - BM25_B)
+        length_scale = BM25_K1 * BM25_B / self.avg_doc_length if self.avg_doc_length else 0.0
+        for term in terms:
+            idf = self._idf(term)
+            doc_ids, frequencies = self.postings[term]
+            for doc_id, frequency in zip(doc_ids, frequencies):
+                score = idf * frequency * (BM25_K1 + 1) / (
+                    frequency + length_norm + length_scale * doc_lengths[doc_id])
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        return scores
+
+    def search(self, query, limit=20, prefix_last=True):
+        """[(pontuação, doc_id)] em ordem decrescente e o total de documentos encontrados.
+
+        Todos os termos precisam aparecer (E); se nenhum documento tiver todos, vale qualquer
+        um deles (OU). O último termo casa por prefixo se prefix_last; os outros só quando não
+        têm correspondência exata.
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.num_docs:
+            return [], 0
+
+        per_token = []
+        for position, token in enumerate(tokens):
+            is_last = position == len(tokens) - 1
+            terms = self._expand(token, allow_prefix=(prefix_last and is_last) or token not in self.postings)
+            if terms:
+                per_token.append(self._score_token(terms))
+        if not per_token:
+            return [], 0
+
+        # Começa pelo token mais raro para a interseção ficar pequena
+        per_token.sort(key=len)
+        matching = set(per_token[0])
+        for scores in per_token[1:]:
+            matching.intersection_update(scores)
+            if not matching:
+                break
+        if len(per_token) == len(tokens) and matching:
+            candidates = matching
+        else:
+            candidates = set().union(*per_token)
+
+        ranked = [(sum(scores.get(doc_id, 0.0) for scores in per_token), doc_id) for doc_id in candidates]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked[:limit], len(ranked)
+
+
+def snippet(text, query, width=160):
+    """Trecho do texto em volta da primeira ocorrência de um termo da consulta"""
+    text = ' '.join(text.split())
+    if len(text) <= width:
+        return text
+    folded = fold(text)
+    # fold() preserva as posições em textos com acentos compostos (NFC), o caso comum
+    start = None
+    if len(folded) == len(text):
+        for token in tokenize(query):
+            match = re.search(r'\b' + re.escape(token), folded)
+            if match and (start is None or match.start() < start):
+                start = match.start()
+    if start is None:
+        return text[:width].rsplit(' ', 1)[0] + '…'
+    begin = max(0, start - width // 3)
+    end = min(len(text), begin + width)
+    begin = max(0, end - width)
+    excerpt = text[begin:end]
+    if begin > 0:
+        excerpt = '…' + excerpt.split(' ', 1)[-1]
+    if end < len(text):
+        excerpt = excerpt.rsplit(' ', 1)[0] + '…'
+    return excerpt
@@ -1,9 +1,27 @@
 #!/bin/bash
+# Qualquer etapa que falhar (inclusive as verificações no fim) interrompe o build
+set -e
+
 # Instalar dependências do backend
 pip install -r backend/requirements.txt
 
+# Normalizar o HTML dos enunciados (não muda nada se os arquivos já estiverem normalizados)
+python scripts/normalize_questions.py
+
+# Gerar os bundles binários das questões
+python scripts/build_question_bundles.py
+
 # Garantir que o diretório instance existe
 mkdir -p instance
 
 # Inicializar o banco de dados
-python -m flask --app run.py init-db
\ No newline at end of file
+python -m flask --app run.py init-db
+
+# Aplicar índices e restrições novos em bancos já existentes
+python -m flask --app run.py upgrade-db
+
+# Conferir que as consultas quentes usam os índices esperados (EXPLAIN QUERY PLAN; só no SQLite)
+python -m flask --app run.py check-query-plans
+
+# Conferir o orçamento de consultas SQL de cada endpoint (banco temporário, não mexe no instance/)
+python scripts/check_query_counts.py
@@ -59,6 +59,12 @@ import { StudySession } from '../../models/study-session.model';
         </table>
       </div>
       
+      <div *ngIf="nextCursor" class="mt-3 text-center">
+        <button (click)="loadMoreSessions()" [disabled]="loadingMore" class="btn btn-outline-primary">
+          <i class="bi bi-arrow-down-circle"></i> {{ loadingMore ? 'Carregando...' : 'Carregar mais sessões' }}
+        </button>
+      </div>
+      
       <div class="mt-4 text-center">
         <button routerLink="/" class="btn btn-secondary">
           <i class="bi bi-arrow-left"></i> Voltar para Início
@@ -166,6 +172,8 @@ import { StudySession } from '../../models/study-session.model';
 })
 export class StudySessionsComponent implements OnInit {
   sessions: StudySession[] = [];
+  nextCursor: string | null = null;
+  loadingMore = false;
 
   constructor(private studySessionService: StudySessionService) { }
 
@@ -174,12 +182,33 @@ export class StudySessionsComponent implements OnInit {
   }
 
   loadSessions(): void {
-    this.studySessionService.getAllSessions().subscribe({
-      next: sessions => this.sessions = sessions,
+    this.studySessionService.getStudySessions().subscribe({
+      next: page => {
+        this.sessions = page.sessions;
+        this.nextCursor = page.nextCursor;
+      },
       error: err => console.error('Erro ao carregar sessões:', err)
     });
   }
 
+  loadMoreSessions(): void {
+    if (!this.nextCursor || this.loadingMore) {
+      return;
+    }
+    this.loadingMore = true;
+    this.studySessionService.getStudySessions(this.nextCursor).subscribe({
+      next: page => {
+        this.sessions = [...this.sessions, ...page.sessions];
+        this.nextCursor = page.nextCursor;
+        this.loadingMore = false;
+      },
+      error: err => {
+        console.error('Erro ao carregar mais sessões:', err);
+        this.loadingMore = false;
+      }
+    });
+  }
+
   deleteSession(sessionId: number): void {
     if (confirm('Tem certeza que deseja excluir esta sessão?')) {
       this.studySessionService.deleteSession(sessionId).subscribe({
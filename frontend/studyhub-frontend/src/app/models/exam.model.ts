@@ -2,4 +2,24 @@ export interface Exam {
   id: string;
   name: string;
   question_count: number;
-}
\ No newline at end of file
+}
+
+export type QuestionStatsSort = 'accuracy' | 'attempts' | 'correct' | 'last_attempt';
+
+export interface QuestionStatsItem {
+  idx: number | null;
+  question_id_original: string;
+  attempts: number;
+  correct_count: number;
+  accuracy: number;
+  last_attempt_at: string | null;
+}
+
+export interface QuestionStatsPage {
+  exam_type: string;
+  sort: QuestionStatsSort;
+  order: 'asc' | 'desc';
+  start: number;
+  total: number;
+  items: QuestionStatsItem[];
+}
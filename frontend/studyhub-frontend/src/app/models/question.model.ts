@@ -13,4 +13,47 @@ export interface Option {
   letra_raw?: string;
   texto: string;
   texto_html?: string;
-}
\ No newline at end of file
+}
+
+export interface QuestionBatchItem {
+  idx: number;
+  question: Question;
+}
+
+export interface QuestionBatch {
+  total: number;
+  items: QuestionBatchItem[];
+  missing_ids: string[];
+}
+
+export interface QuestionSearchResult {
+  exam_type: string;
+  idx: number;
+  id_original_json: string;
+  score: number;
+  snippet: string;
+}
+
+export interface QuestionSearchResponse {
+  query: string;
+  total: number;
+  results: QuestionSearchResult[];
+}
+
+export interface ReviewState {
+  idx: number;
+  question_id_original: string;
+  due_at: string;
+  interval_days: number;
+  ease: number;
+  repetitions: number;
+  lapses: number;
+  last_reviewed_at: string | null;
+}
+
+export interface NextReview {
+  exam_type: string;
+  review: ReviewState | null;
+  question: Question | null;
+  next_due_at: string | null;
+}
@@ -6,6 +6,39 @@ export interface StudySession {
   correct_answers_in_session: number;
   status: 'in_progress' | 'completed' | 'abandoned';
   last_question_idx_viewed: number;
+  session_type?: SessionType;
+  // Ordem embaralhada: questões da sessão vêm de getQuestionBatch(..., shuffleSeed); null = ordem do arquivo
+  shuffle_seed?: number | null;
+  last_position_viewed?: number | null;
+}
+
+export type SessionType = 'study' | 'wrong_answers' | 'mock_exam';
+
+// Página do histórico de sessões; nextCursor (cabeçalho X-Next-Cursor) é null na última página
+export interface StudySessionPage {
+  sessions: StudySession[];
+  nextCursor: string | null;
+}
+
+export interface ReviewSessionItem {
+  idx: number | null;
+  question_id_original: string;
+  answered: boolean;
+}
+
+// Revisão das questões erradas e simulado: lista fixa de questões, respondidas com o session_id da sessão
+export interface ReviewSession {
+  id: number;
+  timestamp: string;
+  status: 'in_progress' | 'completed' | 'abandoned';
+  exam_type: string;
+  session_type: SessionType;
+  time_limit_minutes: number | null;
+  expires_at: string | null;
+  answered_count: number;
+  correct_count: number;
+  total: number;
+  items: ReviewSessionItem[];
 }
 
 export interface UserResponse {
@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { Exam } from '../models/exam.model';
+import { Exam, QuestionStatsPage, QuestionStatsSort } from '../models/exam.model';
 import { environment } from '../../environments/environment';
 
 @Injectable({
@@ -15,4 +15,10 @@ export class ExamService {
   getAvailableExams(): Observable<Exam[]> {
     return this.http.get<Exam[]>(`${this.apiUrl}/exams`);
   }
+
+  // Estatísticas por questão; com o sort padrão (accuracy) as mais difíceis vêm primeiro
+  getQuestionStats(examId: string, sort: QuestionStatsSort = 'accuracy', start = 0, limit = 50): Observable<QuestionStatsPage> {
+    const params = new HttpParams().set('sort', sort).set('start', start).set('limit', limit);
+    return this.http.get<QuestionStatsPage>(`${this.apiUrl}/exams/${examId}/question-stats`, { params });
+  }
 }
\ No newline at end of file
@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { Question } from '../models/question.model';
+import { NextReview, Question, QuestionBatch, QuestionSearchResponse } from '../models/question.model';
 import { environment } from '../../environments/environment';
 
 @Injectable({
@@ -20,11 +20,58 @@ export class QuestionService {
     return this.http.get<Question>(`${this.apiUrl}/questions/${questionIdx}?exam_type=${examType}`);
   }
 
-  submitAnswer(questionId: string, chosenLetters: string[], examType: string): Observable<any> {
+  // Busca várias questões seguidas para pré-carregamento; não altera a sessão.
+  // Com shuffleSeed, start/limit são posições na ordem embaralhada da sessão
+  getQuestionBatch(start: number, limit: number, examType: string, shuffleSeed?: number | null): Observable<QuestionBatch> {
+    const seedParam = shuffleSeed == null ? '' : `&seed=${shuffleSeed}`;
+    return this.http.get<QuestionBatch>(`${this.apiUrl}/questions?exam_type=${examType}&start=${start}&limit=${limit}${seedParam}`);
+  }
+
+  // Busca por palavras-chave; sem examType procura em todos os simulados
+  searchQuestions(query: string, examType?: string, limit = 20): Observable<QuestionSearchResponse> {
+    let params = new HttpParams().set('q', query).set('limit', limit);
+    if (examType) {
+      params = params.set('exam_type', examType);
+    }
+    return this.http.get<QuestionSearchResponse>(`${this.apiUrl}/search`, { params });
+  }
+
+  // sessionId só para sessões com lista fixa (ex.: revisão das erradas); sem ele vale a sessão de estudo atual
+  submitAnswer(questionId: string, chosenLetters: string[], examType: string, sessionId?: number): Observable<any> {
     return this.http.post(`${this.apiUrl}/submit_answer`, {
+      question_id_original: questionId,
+      chosen_letters: chosenLetters,
+      exam_type: examType,
+      session_id: sessionId
+    });
+  }
+
+  // Envia várias respostas de uma vez; cada item volta com o status que teria na rota individual
+  submitAnswers(answers: { question_id_original: string; chosen_letters: string[] }[], examType: string, sessionId?: number): Observable<any> {
+    return this.http.post(`${this.apiUrl}/submit_answers`, {
+      answers,
+      exam_type: examType,
+      session_id: sessionId
+    });
+  }
+
+  // Questões por id, sem alterar a posição da sessão de estudo (usado na revisão das erradas)
+  getQuestionsByIds(questionIds: string[], examType: string): Observable<QuestionBatch> {
+    const params = new HttpParams().set('exam_type', examType).set('ids', questionIds.join(','));
+    return this.http.get<QuestionBatch>(`${this.apiUrl}/questions`, { params });
+  }
+
+  // Próxima questão com revisão vencida (review e question vêm null se não houver nenhuma)
+  getNextReview(examType: string): Observable<NextReview> {
+    return this.http.get<NextReview>(`${this.apiUrl}/review/next?exam_type=${examType}`);
+  }
+
+  // Responde uma questão da revisão: reagenda a questão sem registrar a resposta na sessão de estudo
+  submitReviewAnswer(questionId: string, chosenLetters: string[], examType: string): Observable<any> {
+    return this.http.post(`${this.apiUrl}/review/answer`, {
       question_id_original: questionId,
       chosen_letters: chosenLetters,
       exam_type: examType
     });
   }
-}
\ No newline at end of file
+}
@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
-import { Observable } from 'rxjs';
-import { StudySession } from '../models/study-session.model';
+import { HttpClient, HttpParams } from '@angular/common/http';
+import { Observable, map } from 'rxjs';
+import { ReviewSession, StudySession, StudySessionPage } from '../models/study-session.model';
 import { environment } from '../../environments/environment';
 
 @Injectable({
@@ -23,18 +23,62 @@ export class StudySessionService {
     });
   }
 
+  // Sessão em ordem embaralhada, começando na primeira posição da ordem sorteada
+  startShuffledStudy(examType: string): Observable<StudySession> {
+    return this.http.post<StudySession>(`${this.apiUrl}/start-new-study`, {
+      exam_type: examType,
+      shuffle: true
+    });
+  }
+
   resumeStudy(examType: string): Observable<StudySession> {
     return this.http.get<StudySession>(`${this.apiUrl}/resume-study?exam_type=${examType}`);
   }
 
-  finishStudy(examType: string): Observable<StudySession> {
+  // Sem sessionId encerra a sessão de estudo atual; com ele, a sessão indicada (ex.: revisão das erradas)
+  finishStudy(examType: string, sessionId?: number): Observable<StudySession> {
     return this.http.post<StudySession>(`${this.apiUrl}/finish-study`, {
+      exam_type: examType,
+      session_id: sessionId
+    });
+  }
+
+  getReviewSession(examType: string): Observable<ReviewSession | null> {
+    return this.http.get<ReviewSession | null>(`${this.apiUrl}/review-session?exam_type=${examType}`);
+  }
+
+  getMockExam(examType: string): Observable<ReviewSession | null> {
+    return this.http.get<ReviewSession | null>(`${this.apiUrl}/mock-exam?exam_type=${examType}`);
+  }
+
+  // Sorteia um simulado novo; timeLimitMinutes = 0 desliga o limite de tempo
+  startMockExam(examType: string, numQuestions = 65, timeLimitMinutes = 130): Observable<ReviewSession> {
+    return this.http.post<ReviewSession>(`${this.apiUrl}/mock-exam`, {
+      exam_type: examType,
+      num_questions: numQuestions,
+      time_limit_minutes: timeLimitMinutes
+    });
+  }
+
+  // Nova revisão com as questões cuja última tentativa foi errada
+  startReviewSession(examType: string): Observable<ReviewSession> {
+    return this.http.post<ReviewSession>(`${this.apiUrl}/review-session`, {
       exam_type: examType
     });
   }
 
-  getAllSessions(): Observable<StudySession[]> {
-    return this.http.get<StudySession[]>(`${this.apiUrl}/study-sessions`);
+  // Histórico paginado: sem cursor traz a primeira página; a próxima vem com o nextCursor desta
+  getStudySessions(cursor: string | null = null): Observable<StudySessionPage> {
+    let params = new HttpParams();
+    if (cursor) {
+      params = params.set('cursor', cursor);
+    }
+    return this.http.get<StudySession[]>(`${this.apiUrl}/study-sessions`, { params, observe: 'response' }).pipe(
+      map(response => ({
+        sessions: response.body ?? [],
+        nextCursor: response.headers.get('X-Next-Cursor')
+      }))
+    );
   }
 
   getSessionResults(sessionId: number): Observable<any> {
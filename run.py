@@ -2,18 +2,199 @@
 
 import os
 import sys
+from datetime import datetime
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+import sqlalchemy as sa
 
 # Adiciona o diretório backend ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 # Importa o app do backend
-from app import app, db
+from app import app, db, TestSession, UserResponse, ReviewState, QuestionStats, recompute_session_counters, \
+    rebuild_review_states, rebuild_question_stats, upgrade_database_schema, question_stats_page_query, \
+    QUESTION_STATS_DEFAULT_LIMIT
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'studyhub.sqlite')
 
 @app.cli.command("init-db")
 def init_db_command_run():
     """Cria as tabelas do banco de dados."""
     with app.app_context():
         db.create_all()
-    print("Banco de dados inicializado e tabelas criadas!")
\ No newline at end of file
+    print("Banco de dados inicializado e tabelas criadas!")
+
+@app.cli.command("upgrade-db")
+def upgrade_db_command_run():
+    """Atualiza um banco existente para o schema atual (índices, restrições)."""
+    with app.app_context():
+        removed = upgrade_database_schema()
+    if removed:
+        print(f"Removidas {removed} respostas duplicadas (mesma sessão e questão).")
+    print("Banco de dados atualizado!")
+
+
+@app.cli.command("repair-session-counters")
+def repair_session_counters_command_run():
+    """Recalcula os contadores de respostas das sessões a partir de user_response."""
+    with app.app_context():
+        updated = recompute_session_counters()
+    print(f"Contadores recalculados ({updated} sessões com respostas).")
+
+
+@app.cli.command("rebuild-review-states")
+def rebuild_review_states_command_run():
+    """Refaz a agenda de revisão espaçada a partir de todo o histórico de respostas."""
+    with app.app_context():
+        rebuilt = rebuild_review_states()
+    print(f"Agenda de revisão refeita ({rebuilt} questões).")
+
+
+@app.cli.command("rebuild-question-stats")
+def rebuild_question_stats_command_run():
+    """Recalcula as estatísticas por questão (tentativas, acertos, última tentativa) a partir das respostas."""
+    with app.app_context():
+        rebuilt = rebuild_question_stats()
+    print(f"Estatísticas recalculadas ({rebuilt} questões).")
+
+
+@app.cli.command("copy-db")
+@click.option("--source", default="sqlite:///" + DEFAULT_SQLITE_PATH, show_default=True,
+              help="URI do banco de origem (o destino é o DATABASE_URL configurado).")
+@click.option("--batch-size", default=1000, show_default=True, help="Linhas por lote de leitura/escrita.")
+def copy_db_command_run(source, batch_size):
+    """Copia sessões e respostas de um banco (ex.: o SQLite local) para o DATABASE_URL atual, em lotes."""
+    source_engine = sa.create_engine(source)
+    with app.app_context():
+        if source_engine.url == db.engine.url:
+            raise SystemExit("Origem e destino são o mesmo banco.")
+        
+        upgrade_database_schema()
+        for model in (TestSession, UserResponse):
+            if db.session.query(model.id).first() is not None:
+                raise SystemExit(f"O destino já tem dados em {model.__tablename__}; use um banco vazio.")
+        
+        source_inspector = sa.inspect(source_engine)
+        counters_missing = False
+        for model in (TestSession, UserResponse):
+            table = model.__table__
+            # Bancos antigos podem não ter colunas novas: copia só as que existem na origem
+            source_columns = {column['name'] for column in source_inspector.get_columns(table.name)}
+            columns = [column for column in table.columns if column.name in source_columns]
+            if table.name == TestSession.__tablename__ and 'answered_count' not in source_columns:
+                counters_missing = True
+            
+            source_table = sa.Table(table.name, sa.MetaData(), *[sa.Column(column.name, column.type) for column in columns])
+            copied = 0
+            last_id = None
+            with source_engine.connect() as source_connection:
+                # Lotes por chave primária (keyset), sem OFFSET
+                while True:
+                    query = sa.select(source_table).order_by(source_table.c.id).limit(batch_size)
+                    if last_id is not None:
+                        query = query.where(source_table.c.id > last_id)
+                    rows = [dict(row._mapping) for row in source_connection.execute(query)]
+                    if not rows:
+                        break
+                    db.session.execute(sa.insert(table), rows)
+                    db.session.commit()
+                    copied += len(rows)
+                    last_id = rows[-1]['id']
+            print(f"{table.name}: {copied} linhas copiadas")
+        
+        if counters_missing:
+            recompute_session_counters()
+            print("Contadores das sessões recalculados (origem sem answered_count/correct_count).")
+        
+        # A agenda de revisão e as estatísticas são derivadas das respostas: refeitas no destino em vez de copiadas
+        print(f"Agenda de revisão refeita ({rebuild_review_states()} questões).")
+        print(f"Estatísticas por questão recalculadas ({rebuild_question_stats()} questões).")
+        
+        # No Postgres as sequences não andam com ids inseridos explicitamente
+        if db.engine.dialect.name == 'postgresql':
+            for model in (TestSession, UserResponse):
+                db.session.execute(sa.text(
+                    f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {model.__tablename__}), 1))"
+                ))
+            db.session.commit()
+    print("Cópia concluída!")
+
+
+def hot_query_plan_checks():
+    """Consultas quentes da API e o índice que cada uma deve usar, sem ordenação em B-tree temporária."""
+    return [
+        (
+            "sessão em progresso mais recente do exame",
+            TestSession.query.filter_by(status='in_progress', exam_type='x', session_type='study')
+            .order_by(db.desc(TestSession.timestamp)).limit(1),
+            'ix_test_session_status_exam_type_timestamp'
+        ),
+        (
+            "resposta de uma questão na sessão",
+            UserResponse.query.filter_by(test_session_id=1, question_id_original='1'),
+            'uq_user_response_session_question'
+        ),
+        (
+            "respostas da sessão em ordem cronológica",
+            UserResponse.query.filter_by(test_session_id=1).order_by(UserResponse.timestamp),
+            'ix_user_response_session_timestamp'
+        ),
+        (
+            "histórico de sessões paginado",
+            db.select(TestSession.id, TestSession.timestamp)
+            .where(db.or_(TestSession.timestamp < datetime(2030, 1, 1),
+                          db.and_(TestSession.timestamp == datetime(2030, 1, 1), TestSession.id < 10)))
+            .order_by(db.desc(TestSession.timestamp), db.desc(TestSession.id)).limit(51),
+            'ix_test_session_timestamp_id'
+        ),
+        (
+            "histórico de sessões de um exame paginado",
+            db.select(TestSession.id, TestSession.timestamp).where(TestSession.exam_type == 'x')
+            .order_by(db.desc(TestSession.timestamp), db.desc(TestSession.id)).limit(51),
+            'ix_test_session_exam_type_timestamp_id'
+        ),
+        (
+            "próxima revisão vencida do exame",
+            ReviewState.query.filter(ReviewState.exam_type == 'x')
+            .order_by(ReviewState.due_at, ReviewState.id).limit(10),
+            'ix_review_state_exam_type_due_at_id'
+        ),
+        (
+            "agenda de revisão das questões respondidas",
+            ReviewState.query.filter(ReviewState.exam_type == 'x', ReviewState.question_id_original.in_(['1', '2'])),
+            'uq_review_state_exam_type_question'
+        ),
+        (
+            "questões com a última tentativa errada",
+            db.select(ReviewState.question_id_original)
+            .where(ReviewState.exam_type == 'x', ReviewState.last_answer_correct == db.false()),
+            'ix_review_state_exam_type_last_answer_correct'
+        ),
+        (
+            "estatísticas das questões de um exame, por acurácia (primeira página)",
+            question_stats_page_query('x', 'accuracy', 'asc', 0, QUESTION_STATS_DEFAULT_LIMIT),
+            'ix_question_stats_exam_type_accuracy'
+        ),
+    ]
+
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command_run():
+    """Roda EXPLAIN QUERY PLAN nas consultas quentes e falha se alguma não usar o índice esperado."""
+    failures = 0
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print("AVISO: check-query-plans só é suportado no SQLite.")
+            return
+        for description, query, expected_index in hot_query_plan_checks():
+            statement = query.statement if hasattr(query, 'statement') else query
+            sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))]
+            ok = any(expected_index in step for step in plan) and \
+                not any('USE TEMP B-TREE' in step for step in plan)
+            failures += 0 if ok else 1
+            print(f"{'✅' if ok else '❌'} {description}: {' | '.join(plan)}")
+    if failures:
+        raise SystemExit(f"{failures} consulta(s) sem o índice esperado.")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark da página de resultados (/api/results/session/<id>).
+
+Cria uma sessão com N respostas num banco SQLite temporário (via DATABASE_URL) e mede:
+  - a busca de questões do jeito antigo (varredura linear por resposta)
+  - a busca pelo índice id_original_json -> posição/questão
+  - a latência da rota completa via test_client, com a busca antiga (trocando
+    find_question_by_original_id por uma varredura linear) e com o índice
+
+Uso:
+    python scripts/benchmark_session_results.py [exam_type] [num_respostas] [repeticoes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+TMP_DIR = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR.name, 'bench.sqlite')
+
+import app as app_module
+from app import app, db, TestSession, UserResponse, load_questions_for_exam, find_question_by_original_id
+
+EXAM_TYPE = sys.argv[1] if len(sys.argv) > 1 else 'solutions-architect-associate'
+NUM_RESPONSES = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+REPEAT = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+
+def legacy_lookup(questions, question_ids):
+    """Reproduz a busca antiga de get_session_results: dict + next() linear por resposta"""
+    questions_dict_by_id = {
+        str(q.get('id_original_json')): q for q in questions if q.get('id_original_json') is not None
+    }
+    found = []
+    for question_id in question_ids:
+        question_details = questions_dict_by_id.get(str(question_id))
+        question_idx = None
+        if question_details:
+            try:
+                question_idx = next(
+                    idx for idx, q_data in enumerate(questions)
+                    if str(q_data.get('id_original_json')) == str(question_id)
+                )
+            except StopIteration:
+                pass
+        found.append((question_idx, question_details))
+    return found
+
+
+def legacy_finder(questions):
+    """Substituto de find_question_by_original_id com a varredura linear antiga, para medir a rota de antes.
+    O dict por id que o código antigo montava a cada requisição fica de fora (o "antes" sai um pouco otimista)."""
+    def find(exam_type, question_id_original):
+        for idx, q_data in enumerate(questions):
+            if str(q_data.get('id_original_json')) == str(question_id_original):
+                return idx, q_data
+        return None, None
+    return find
+
+
+def indexed_lookup(exam_type, question_ids):
+    return [find_question_by_original_id(exam_type, question_id) for question_id in question_ids]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    questions = load_questions_for_exam(EXAM_TYPE)
+    if not questions:
+        print(f"ERRO: nenhuma questão carregada para {EXAM_TYPE}")
+        return 1
+
+    # Pega as últimas questões do banco para o pior caso da varredura linear
+    question_ids = [str(q['id_original_json']) for q in questions[-NUM_RESPONSES:]]
+
+    with TMP_DIR:
+        with app.app_context():
+            db.create_all()
+            session_obj = TestSession(status='in_progress', exam_type=EXAM_TYPE)
+            db.session.add(session_obj)
+            db.session.flush()
+            db.session.add_all([
+                UserResponse(
+                    test_session_id=session_obj.id,
+                    question_id_original=question_id,
+                    user_answers_letters_json='["A"]',
+                    is_correct=False
+                ) for question_id in question_ids
+            ])
+            db.session.commit()
+            session_id = session_obj.id
+
+        # O código antigo trabalhava sobre a lista de dicts já decodificada
+        legacy_ms = timed(legacy_lookup, list(questions), question_ids)
+        indexed_ms = timed(indexed_lookup, EXAM_TYPE, question_ids)
+
+        client = app.test_client()
+        client.get(f'/api/results/session/{session_id}')  # aquecimento
+        route_ms = timed(client.get, f'/api/results/session/{session_id}')
+        app_module.find_question_by_original_id = legacy_finder(list(questions))
+        try:
+            legacy_route_ms = timed(client.get, f'/api/results/session/{session_id}')
+        finally:
+            app_module.find_question_by_original_id = find_question_by_original_id
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"Exame: {EXAM_TYPE} ({len(questions)} questões), {len(question_ids)} respostas, {REPEAT} repetições")
+    print(f"  busca linear (antes):       {legacy_ms:8.2f} ms")
+    print(f"  busca por índice (depois):  {indexed_ms:8.2f} ms")
+    print(f"  rota completa (antes):      {legacy_route_ms:8.2f} ms")
+    print(f"  rota completa (depois):     {route_ms:8.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escrita concorrente no SQLite com os perfis de STUDYHUB_SQLITE_PROFILE.
+
+Sobe N processos (como os workers do gunicorn), cada um respondendo M questões de um
+exame diferente via /api/submit_answer no mesmo arquivo SQLite temporário, e mede
+respostas gravadas por segundo, latência e quantas falharam (ex.: "database is locked").
+
+Uso:
+    python scripts/benchmark_sqlite_concurrency.py [processos] [respostas_por_processo] [perfis...]
+
+Exemplo:
+    python scripts/benchmark_sqlite_concurrency.py 8 150 default performance
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_worker(worker_idx, num_answers, start_at):
+    """Executado em cada processo filho: responde num_answers questões e imprime as medições em JSON"""
+    sys.path.append(os.path.join(PROJECT_ROOT, 'backend'))
+    from app import app, AVAILABLE_EXAMS, load_questions_for_exam
+
+    exam_type = list(AVAILABLE_EXAMS)[worker_idx % len(AVAILABLE_EXAMS)]
+    questions = load_questions_for_exam(exam_type)[:num_answers]
+    client = app.test_client()
+
+    # Todos os processos começam juntos
+    time.sleep(max(0.0, start_at - time.time()))
+    client.post('/api/start-new-study', json={'exam_type': exam_type})
+
+    latencies_ms = []
+    failures = 0
+    for question in questions:
+        started = time.perf_counter()
+        response = client.post('/api/submit_answer', json={
+            'exam_type': exam_type,
+            'question_id_original': question['id_original_json'],
+            'chosen_letters': ['A'] * question.get('num_answers_to_select', 1)
+        })
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            failures += 1
+
+    print(json.dumps({'latencies_ms': latencies_ms, 'failures': failures, 'finished_at': time.time()}))
+
+
+def run_profile(profile, num_workers, num_answers):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ,
+                   DATABASE_URL='sqlite:///' + os.path.join(tmp_dir, 'bench.sqlite'),
+                   STUDYHUB_SQLITE_PROFILE=profile)
+
+        # Cria as tabelas antes de subir os processos
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'run.py', 'init-db'],
+            cwd=PROJECT_ROOT, env=env, check=True, capture_output=True
+        )
+
+        start_at = time.time() + 3
+        workers = [
+            subprocess.Popen(
+                [sys.executable, __file__, '--worker', str(idx), str(num_answers), str(start_at)],
+                cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            ) for idx in range(num_workers)
+        ]
+        outputs = [json.loads(worker.communicate()[0].strip().splitlines()[-1]) for worker in workers]
+
+    latencies = sorted(latency for output in outputs for latency in output['latencies_ms'])
+    failures = sum(output['failures'] for output in outputs)
+    elapsed = max(output['finished_at'] for output in outputs) - start_at
+    succeeded = len(latencies) - failures
+
+    print(f"Perfil {profile}: {num_workers} processos x {num_answers} respostas")
+    print(f"  gravadas/s:  {succeeded / elapsed:8.1f}  ({succeeded} em {elapsed:.2f} s, {failures} falhas)")
+    print(f"  latência ms: p50 {statistics.median(latencies):.1f}  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}  máx {latencies[-1]:.1f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        run_worker(int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4]))
+        return 0
+
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    num_answers = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    profiles = sys.argv[3:] or ['default', 'performance']
+    for profile in profiles:
+        run_profile(profile, num_workers, num_answers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
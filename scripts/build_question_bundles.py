@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Gera os bundles binários (.qbundle) usados pelo backend a partir dos
+arquivos *_questoes.json processados.
+
+Uso:
+    python scripts/build_question_bundles.py [diretório]
+
+Por padrão processa Questões/exams/questoes_processadas/. Rodar de novo sempre
+que um JSON for atualizado: o backend ignora bundles desatualizados e volta a
+ler o JSON.
+"""
+import glob
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, 'backend'))
+
+from question_bundle import bundle_path_for, write_bundle
+
+DEFAULT_DIR = os.path.join(PROJECT_ROOT, 'Questões', 'exams', 'questoes_processadas')
+
+
+def main():
+    source_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR
+    json_files = sorted(glob.glob(os.path.join(source_dir, '*_questoes.json')))
+
+    if not json_files:
+        print(f"AVISO: Nenhum arquivo *_questoes.json encontrado em {source_dir}")
+        return 1
+
+    total_json_bytes = 0
+    total_bundle_bytes = 0
+    for json_path in json_files:
+        bundle_path = bundle_path_for(json_path)
+        try:
+            valid, total = write_bundle(json_path, bundle_path)
+        except ValueError as e:
+            print(f"❌ {os.path.basename(json_path)}: {e}")
+            continue
+
+        json_bytes = os.path.getsize(json_path)
+        bundle_bytes = os.path.getsize(bundle_path)
+        total_json_bytes += json_bytes
+        total_bundle_bytes += bundle_bytes
+        print(f"✅ {os.path.basename(bundle_path)}: {valid}/{total} questões, "
+              f"{json_bytes / 1024:.0f} KB -> {bundle_bytes / 1024:.0f} KB")
+
+    print(f"\nTotal: {total_json_bytes / 1024:.0f} KB de JSON -> {total_bundle_bytes / 1024:.0f} KB em bundles")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Confere o número máximo de consultas SQL de cada endpoint (e a ausência de N+1).
+
+Roda o fluxo de estudo via test_client num banco SQLite temporário (DATABASE_URL) e falha
+se alguma rota passar do orçamento de QUERY_BUDGETS. Rodar depois de mexer nas rotas; se
+uma rota precisar de mais consultas de propósito, ajuste o orçamento junto.
+
+Uso:
+    python scripts/check_query_counts.py [exam_type]
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+TMP_DIR = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR.name, 'queries.sqlite')
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app, db, load_questions_for_exam, upgrade_database_schema, find_repeated_statements, statement_shape
+
+EXAM_TYPE = sys.argv[1] if len(sys.argv) > 1 else 'cloudops-engineer'
+NUM_ANSWERS = 12
+
+# Máximo de consultas por endpoint (PRAGMAs de conexão nova não contam: o pool já está aquecido)
+QUERY_BUDGETS = {
+    'GET /api/exams': 0,
+    'GET /api/questions/count': 0,
+    'GET /api/questions/<idx>': 0,
+    'GET /api/questions': 0,
+    'POST /api/start-new-study': 4,
+    # Busca da sessão + gravação da posição pendente + recarga da sessão após o commit
+    'GET /api/current-session': 3,
+    # Cada resposta também lê e grava a agenda de revisão (review_state) e faz o upsert de question_stats
+    'POST /api/submit_answer': 6,
+    'POST /api/submit_answers': 7,
+    'GET /api/review/next': 1,
+    'POST /api/review/answer': 2,
+    # Questões erradas + revisão anterior + INSERT + recarga da sessão após o commit
+    'POST /api/review-session': 4,
+    'GET /api/review-session': 2,
+    # Estatísticas do exame (pesos do sorteio) + simulado anterior + INSERT + recarga da sessão após o commit
+    'POST /api/mock-exam': 4,
+    'GET /api/mock-exam': 2,
+    'GET /api/exams/<id>/question-stats': 2,
+    'GET /api/resume-study': 1,
+    'POST /api/finish-study': 3,
+    'GET /api/study-sessions': 1,
+    'GET /api/results/session/<id>': 2,
+    # Agregado das respostas da sessão + UPDATE em lote + DELETE das estatísticas zeradas
+    # + histórico restante das questões, DELETE e INSERT da agenda de revisão
+    'DELETE /api/session/<id>': 10,
+}
+
+# Listas abertas por capture_queries() que recebem o SQL de cada consulta executada
+QUERY_CAPTURES = []
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def capture_statement(conn, cursor, statement, parameters, context, executemany):
+    for captured in QUERY_CAPTURES:
+        captured.append(statement)
+
+
+@contextmanager
+def capture_queries():
+    """Lista do SQL de todas as consultas executadas dentro do bloco"""
+    captured = []
+    QUERY_CAPTURES.append(captured)
+    try:
+        yield captured
+    finally:
+        QUERY_CAPTURES.remove(captured)
+
+
+@contextmanager
+def assert_max_queries(max_queries, description=''):
+    """Falha com AssertionError se o bloco executar mais que max_queries consultas ou tiver N+1"""
+    with capture_queries() as captured:
+        yield captured
+    problems = []
+    if len(captured) > max_queries:
+        problems.append(f"{len(captured)} consultas (máximo {max_queries})")
+    repeated = find_repeated_statements([(None, statement) for statement in captured])
+    problems.extend(f"N+1: {count}x {shape}" for count, shape in repeated)
+    if problems:
+        statements = '\n'.join(f"  {statement_shape(statement)}" for statement in captured)
+        raise AssertionError(f"{description}: {'; '.join(problems)}\n{statements}")
+
+
+def main():
+    questions = load_questions_for_exam(EXAM_TYPE)[:NUM_ANSWERS * 2]
+    if not questions:
+        print(f"ERRO: nenhuma questão carregada para {EXAM_TYPE}")
+        return 1
+
+    with app.app_context():
+        upgrade_database_schema()
+
+    client = app.test_client()
+    client.get('/api/current-session', query_string={'exam_type': EXAM_TYPE})  # abre a conexão do pool
+    failures = 0
+
+    def check(name, method, path, **kwargs):
+        nonlocal failures
+        try:
+            with assert_max_queries(QUERY_BUDGETS[name], name) as captured:
+                response = client.open(path, method=method, **kwargs)
+            print(f"✅ {name}: {len(captured)} consultas (máximo {QUERY_BUDGETS[name]})")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {e}")
+            return None
+        if response.status_code >= 400:
+            failures += 1
+            print(f"❌ {name}: status {response.status_code}")
+        return response.get_json(silent=True)
+
+    exam = {'exam_type': EXAM_TYPE}
+    check('GET /api/exams', 'GET', '/api/exams')
+    check('GET /api/questions/count', 'GET', '/api/questions/count', query_string=exam)
+    check('POST /api/start-new-study', 'POST', '/api/start-new-study', json=exam)
+    check('GET /api/questions/<idx>', 'GET', '/api/questions/0', query_string=exam)
+    check('GET /api/questions', 'GET', '/api/questions', query_string={**exam, 'start': 0, 'limit': 10})
+    check('GET /api/current-session', 'GET', '/api/current-session', query_string=exam)
+    client.get('/api/questions/5', query_string=exam)
+    check('GET /api/current-session', 'GET', '/api/current-session', query_string=exam)
+
+    def answer(question):
+        return {'question_id_original': question['id_original_json'],
+                'chosen_letters': ['A'] * question.get('num_answers_to_select', 1)}
+
+    for question in questions[:NUM_ANSWERS]:
+        check('POST /api/submit_answer', 'POST', '/api/submit_answer', json={**exam, **answer(question)})
+    check('POST /api/submit_answers', 'POST', '/api/submit_answers',
+          json={**exam, 'answers': [answer(question) for question in questions[NUM_ANSWERS:]]})
+    check('GET /api/resume-study', 'GET', '/api/resume-study', query_string=exam)
+    check('GET /api/review/next', 'GET', '/api/review/next', query_string=exam)
+    check('POST /api/review/answer', 'POST', '/api/review/answer', json={**exam, **answer(questions[0])})
+    review = check('POST /api/review-session', 'POST', '/api/review-session', json=exam)
+    wrong_before = {item['question_id_original'] for item in review['items']} if review else set()
+    check('GET /api/review-session', 'GET', '/api/review-session', query_string=exam)
+    check('POST /api/mock-exam', 'POST', '/api/mock-exam', json={**exam, 'num_questions': 20})
+    check('GET /api/mock-exam', 'GET', '/api/mock-exam', query_string=exam)
+    check('GET /api/exams/<id>/question-stats', 'GET', f'/api/exams/{EXAM_TYPE}/question-stats')
+
+    finished = check('POST /api/finish-study', 'POST', '/api/finish-study', json=exam)
+    check('GET /api/study-sessions', 'GET', '/api/study-sessions')
+    if finished:
+        check('GET /api/results/session/<id>', 'GET', f"/api/results/session/{finished['id']}")
+        check('DELETE /api/session/<id>', 'DELETE', f"/api/session/{finished['id']}")
+        # As respostas erradas da sessão excluída não podem continuar na revisão de questões erradas
+        response = client.post('/api/review-session', json=exam)
+        wrong_after = {item['question_id_original'] for item in response.get_json().get('items', [])}
+        if not wrong_before or wrong_after & wrong_before:
+            failures += 1
+            print(f"❌ POST /api/review-session após excluir a sessão: {len(wrong_after & wrong_before)} "
+                  f"de {len(wrong_before)} questões erradas da sessão excluída continuam na revisão")
+        else:
+            print(f"✅ POST /api/review-session após excluir a sessão: nenhuma das {len(wrong_before)} "
+                  f"questões erradas da sessão excluída continua na revisão")
+
+    with app.app_context():
+        db.engine.dispose()
+    TMP_DIR.cleanup()
+
+    if failures:
+        print(f"\n{failures} verificação(ões) acima do orçamento de consultas.")
+        return 1
+    print("\nTodos os endpoints dentro do orçamento de consultas.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
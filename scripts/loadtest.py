@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do backend com fluxos de estudo realistas.
+
+Cada usuário virtual repete o fluxo: start-new-study -> busca N questões -> responde cada
+uma -> finish-study -> página de resultados. Ao final sai, por endpoint, a vazão e as
+latências p50/p95/p99.
+
+Por padrão sobe um gunicorn local (backend/gunicorn.conf.py) com um banco SQLite
+temporário e um conjunto sintético de questões, sem precisar de rede nem dos arquivos
+reais. Também grava e reproduz traces de requisições.
+
+Uso:
+    python scripts/loadtest.py --users 8 --duration 30
+    python scripts/loadtest.py --users 4 --questions 20 --record trace.jsonl
+    python scripts/loadtest.py --replay trace.jsonl --speed 2
+    python scripts/loadtest.py --url http://localhost:5002 --real-data
+
+Observação: o backend tem uma sessão em progresso por exame, então usuários além do
+número de exames disponíveis compartilham sessões (e recebem 409/400 esperados).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'backend')
+sys.path.append(BACKEND_DIR)
+
+# Agrupa caminhos com ids/índices num mesmo endpoint do relatório
+ENDPOINT_PATTERNS = [
+    (re.compile(r'^/api/questions/\d+'), '/api/questions/<idx>'),
+    (re.compile(r'^/api/results/session/\d+'), '/api/results/session/<id>'),
+    (re.compile(r'^/api/session/\d+'), '/api/session/<id>'),
+]
+SESSION_ID_IN_PATH = re.compile(r'^(/api/(?:results/session|session)/)(\d+)')
+
+
+def endpoint_name(method, path):
+    path = path.split('?', 1)[0]
+    for pattern, name in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            path = name
+            break
+    return f"{method} {path}"
+
+
+# --- Dados sintéticos ---
+
+def write_synthetic_questions(target_dir, questions_per_exam, seed=42):
+    """Gera um *_questoes.json sintético para cada exame de AVAILABLE_EXAMS"""
+    from app import AVAILABLE_EXAMS
+
+    rng = random.Random(seed)
+    words = ('amazon s3 bucket lambda kinesis firehose dynamodb replication latency company '
+             'solution requirements cost availability region instance policy encryption '
+             'stream analytics cluster throughput').split()
+    for exam_id, exam_info in AVAILABLE_EXAMS.items():
+        questions = []
+        for number in range(1, questions_per_exam + 1):
+            num_answers = 2 if rng.random() < 0.15 else 1
+            letters = 'ABCDE' if num_answers == 2 else 'ABCD'
+            statement = ' '.join(rng.choice(words) for _ in range(rng.randint(80, 220)))
+            questions.append({
+                'id_original_json': str(number),
+                'url_original': f'https://example.invalid/{exam_id}/{number}',
+                'titulo_original': f'Exam {exam_info["name"]} topic 1 question {number} discussion',
+                'enunciado_html': f'<p>\n\t\t\t\t{statement}\n\t\t\t</p>',
+                'opcoes': [
+                    {'letra_raw': f'{letter}.', 'letra': letter,
+                     'texto': ' '.join(rng.choice(words) for _ in range(rng.randint(10, 30)))}
+                    for letter in letters
+                ],
+                'resposta_sugerida_letra': ''.join(sorted(rng.sample(letters, num_answers))),
+                'num_answers_to_select': num_answers
+            })
+        file_name = os.path.basename(exam_info['file'])
+        with open(os.path.join(target_dir, file_name), 'w', encoding='utf-8') as f:
+            json.dump(questions, f, ensure_ascii=False)
+
+
+# --- Servidor local ---
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(work_dir, questions_dir, extra_env):
+    port = free_port()
+    env = dict(os.environ,
+               PORT=str(port),
+               DATABASE_URL='sqlite:///' + os.path.join(work_dir, 'loadtest.sqlite'),
+               **extra_env)
+    if questions_dir:
+        env['STUDYHUB_QUESTIONS_DIR'] = questions_dir
+
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run.py', 'upgrade-db'],
+                   cwd=PROJECT_ROOT, env=env, check=True, capture_output=True)
+    log_file = open(os.path.join(work_dir, 'gunicorn.log'), 'w')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            status, _, _ = HttpClient(base_url).request('GET', '/api/ready')
+            if status == 200:
+                return server, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"Servidor não ficou pronto; veja {log_file.name}")
+
+
+# --- Cliente e gravação ---
+
+class HttpClient:
+    """Conexão keep-alive de um usuário virtual"""
+
+    def __init__(self, base_url):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.connection.close()
+                    self.connection = None
+                return response.status, data, response
+            except (http.client.HTTPException, ConnectionError):
+                # O gunicorn fecha conexões ociosas; tenta de novo numa nova
+                self.connection.close()
+                self.connection = None
+                if attempt == 1:
+                    raise
+
+
+class Recorder:
+    """Coleta latências por endpoint e, opcionalmente, grava o trace em JSONL"""
+
+    def __init__(self, trace_path=None):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.statuses = {}
+        self.started = time.perf_counter()
+        self.trace_file = open(trace_path, 'w', encoding='utf-8') if trace_path else None
+
+    def call(self, client, method, path, body=None, user=0):
+        sent_at = time.perf_counter()
+        try:
+            status, data, _ = client.request(method, path, body)
+        except OSError:
+            status, data = 599, b''
+        latency_ms = (time.perf_counter() - sent_at) * 1000
+
+        parsed = None
+        if data:
+            try:
+                parsed = json.loads(data)
+            except ValueError:
+                pass
+
+        name = endpoint_name(method, path)
+        with self.lock:
+            self.samples.setdefault(name, []).append(latency_ms)
+            self.statuses.setdefault(name, {}).setdefault(status, 0)
+            self.statuses[name][status] += 1
+            if self.trace_file:
+                record = {'t': round(sent_at - self.started, 4), 'user': user, 'method': method,
+                          'path': path, 'body': body, 'status': status}
+                # Guarda o id da sessão criada para remapear no replay
+                if isinstance(parsed, dict) and 'id' in parsed:
+                    record['response_id'] = parsed['id']
+                self.trace_file.write(json.dumps(record) + '\n')
+        return status, parsed
+
+    def close(self):
+        if self.trace_file:
+            self.trace_file.close()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(len(latencies) for latencies in self.samples.values())
+        print(f"\n{total} requisições em {elapsed:.1f} s ({total / elapsed:.1f} req/s)\n")
+        print(f"{'endpoint':42} {'n':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}  status")
+        for name in sorted(self.samples):
+            latencies = sorted(self.samples[name])
+            statuses = ' '.join(f"{status}:{count}" for status, count in sorted(self.statuses[name].items()))
+            print(f"{name:42} {len(latencies):6d} {len(latencies) / elapsed:8.1f} "
+                  f"{percentile(latencies, 50):8.1f} {percentile(latencies, 95):8.1f} "
+                  f"{percentile(latencies, 99):8.1f}  {statuses}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+# --- Fluxos ---
+
+def study_flow(recorder, client, user, exam_type, questions_per_flow, rng):
+    """Um ciclo completo de estudo de um usuário"""
+    status, count = recorder.call(client, 'GET', f'/api/questions/count?exam_type={exam_type}', user=user)
+    if status != 200 or not count:
+        return
+    start_idx = rng.randrange(max(1, count - questions_per_flow))
+    recorder.call(client, 'POST', '/api/start-new-study',
+                  {'exam_type': exam_type, 'start_question_idx': start_idx}, user=user)
+
+    for question_idx in range(start_idx, min(count, start_idx + questions_per_flow)):
+        status, question = recorder.call(client, 'GET', f'/api/questions/{question_idx}?exam_type={exam_type}', user=user)
+        if status != 200 or not question:
+            continue
+        options = [option['letra'] for option in question['opcoes']]
+        num_answers = question.get('num_answers_to_select', 1)
+        # ~60% de acerto, como um aluno mediano
+        if rng.random() < 0.6 and question.get('resposta_sugerida_letra'):
+            chosen = list(question['resposta_sugerida_letra'])
+        else:
+            chosen = rng.sample(options, min(num_answers, len(options)))
+        recorder.call(client, 'POST', '/api/submit_answer', {
+            'exam_type': exam_type,
+            'question_id_original': question['id_original_json'],
+            'chosen_letters': chosen
+        }, user=user)
+
+    status, finished = recorder.call(client, 'POST', '/api/finish-study', {'exam_type': exam_type}, user=user)
+    if status == 200 and finished:
+        recorder.call(client, 'GET', f"/api/results/session/{finished['id']}", user=user)
+    recorder.call(client, 'GET', '/api/study-sessions?limit=20', user=user)
+
+
+def run_flows(base_url, recorder, users, duration, iterations, questions_per_flow, seed):
+    from app import AVAILABLE_EXAMS
+    exam_types = list(AVAILABLE_EXAMS)
+    deadline = time.time() + duration if duration else None
+
+    def user_loop(user):
+        rng = random.Random(seed + user)
+        client = HttpClient(base_url)
+        exam_type = exam_types[user % len(exam_types)]
+        done = 0
+        while (deadline is None or time.time() < deadline) and (not iterations or done < iterations):
+            study_flow(recorder, client, user, exam_type, questions_per_flow, rng)
+            done += 1
+
+    threads = [threading.Thread(target=user_loop, args=(user,)) for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def replay_trace(base_url, recorder, trace_path, speed):
+    """Reproduz um trace gravado mantendo o espaçamento entre requisições (dividido por speed)"""
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    by_user = {}
+    for record in records:
+        by_user.setdefault(record['user'], []).append(record)
+
+    session_ids = {}
+    session_ids_lock = threading.Lock()
+    replay_started = time.perf_counter()
+
+    def user_replay(user_records):
+        client = HttpClient(base_url)
+        for record in user_records:
+            if speed > 0:
+                wait = record['t'] / speed - (time.perf_counter() - replay_started)
+                if wait > 0:
+                    time.sleep(wait)
+            path = record['path']
+            match = SESSION_ID_IN_PATH.match(path)
+            if match:
+                with session_ids_lock:
+                    new_id = session_ids.get(int(match.group(2)))
+                if new_id is not None:
+                    path = f"{match.group(1)}{new_id}{path[match.end():]}"
+            _, parsed = recorder.call(client, record['method'], path, record.get('body'), user=record['user'])
+            if 'response_id' in record and isinstance(parsed, dict) and 'id' in parsed:
+                with session_ids_lock:
+                    session_ids[record['response_id']] = parsed['id']
+
+    threads = [threading.Thread(target=user_replay, args=(user_records,)) for user_records in by_user.values()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos fluxos de estudo do StudyHub")
+    parser.add_argument('--url', help="Usa um servidor já rodando em vez de subir um local")
+    parser.add_argument('--users', type=int, default=4, help="Usuários virtuais simultâneos")
+    parser.add_argument('--duration', type=float, default=20, help="Duração em segundos (0 = só --iterations)")
+    parser.add_argument('--iterations', type=int, default=0, help="Fluxos por usuário (0 = até acabar a duração)")
+    parser.add_argument('--questions', type=int, default=10, help="Questões respondidas por fluxo")
+    parser.add_argument('--synthetic-size', type=int, default=300, help="Questões por exame no conjunto sintético")
+    parser.add_argument('--real-data', action='store_true', help="Usa os arquivos de questões reais do repositório")
+    parser.add_argument('--record', help="Grava o trace das requisições neste arquivo JSONL")
+    parser.add_argument('--replay', help="Reproduz um trace gravado em vez de gerar fluxos")
+    parser.add_argument('--speed', type=float, default=1.0, help="Velocidade do replay (0 = sem pausas)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--env', action='append', default=[], metavar='NOME=VALOR',
+                        help="Variável de ambiente extra para o servidor local (repetível)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='studyhub-loadtest-')
+    server = None
+    try:
+        base_url = args.url
+        if not base_url:
+            questions_dir = None
+            if not args.real_data:
+                questions_dir = os.path.join(work_dir, 'questions')
+                os.makedirs(questions_dir)
+                write_synthetic_questions(questions_dir, args.synthetic_size, args.seed)
+            extra_env = dict(item.split('=', 1) for item in args.env)
+            server, base_url = start_local_server(work_dir, questions_dir, extra_env)
+            print(f"Servidor local em {base_url} (dados em {work_dir})")
+
+        recorder = Recorder(args.record)
+        if args.replay:
+            replay_trace(base_url, recorder, args.replay, args.speed)
+        else:
+            run_flows(base_url, recorder, args.users, args.duration, args.iterations, args.questions, args.seed)
+        recorder.close()
+        recorder.report()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Normaliza o enunciado_html dos arquivos *_questoes.json processados e grava o
+enunciado em texto puro (enunciado_texto) de cada questão.
+
+Colapsa os espaços herdados da página original, remove tags vazias e wrappers
+redundantes (ver backend/question_html.py) e mostra, por exame, quantos bytes o
+HTML e os payloads servidos perderam. Rodar depois do scraping e antes de
+scripts/build_question_bundles.py; rodar de novo não muda nada.
+
+Uso:
+    python scripts/normalize_questions.py [--check] [diretório]
+
+Com --check só mostra o relatório, sem gravar.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, 'backend'))
+
+from question_bundle import encode_question, is_valid_question
+from question_html import html_to_text, normalize_html
+
+DEFAULT_DIR = os.path.join(PROJECT_ROOT, 'Questões', 'exams', 'questoes_processadas')
+
+
+def serialize(questions):
+    # Mesmo formato dos scripts de processamento (indent=4, UTF-8 sem escapes)
+    return json.dumps(questions, indent=4, ensure_ascii=False).encode('utf-8')
+
+
+def normalize_file(json_path, write=True):
+    """Normaliza um arquivo. Retorna (questões alteradas, bytes de HTML antes/depois,
+    bytes dos payloads servidos antes/depois, bytes do arquivo antes/depois)"""
+    with open(json_path, 'rb') as f:
+        raw_source = f.read()
+    questions = json.loads(raw_source.decode('utf-8'))
+
+    changed = 0
+    html_before = html_after = 0
+    payload_before = payload_after = 0
+    for question in questions:
+        source_html = question.get('enunciado_html')
+        if not isinstance(source_html, str):
+            continue
+        if is_valid_question(question):
+            payload_before += len(encode_question(question))
+        normalized = normalize_html(source_html)
+        text = html_to_text(normalized)
+        html_before += len(source_html.encode('utf-8'))
+        html_after += len(normalized.encode('utf-8'))
+        if normalized != source_html or question.get('enunciado_texto') != text:
+            question['enunciado_html'] = normalized
+            question['enunciado_texto'] = text
+            changed += 1
+        if is_valid_question(question):
+            payload_after += len(encode_question(question))
+
+    output = serialize(questions) if changed else raw_source
+    if changed and write:
+        # Escreve num arquivo temporário e troca atomicamente (o backend pode estar lendo)
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, json_path)
+    return changed, html_before, html_after, payload_before, payload_after, len(raw_source), len(output)
+
+
+def format_savings(html_before, html_after, payload_before, payload_after):
+    return (f"HTML {html_before / 1024:.0f} KB -> {html_after / 1024:.0f} KB "
+            f"(-{(html_before - html_after) / 1024:.1f} KB), "
+            f"payloads {payload_before / 1024:.0f} KB -> {payload_after / 1024:.0f} KB "
+            f"(-{(payload_before - payload_after) / 1024:.1f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normaliza o enunciado_html dos arquivos de questões")
+    parser.add_argument('directory', nargs='?', default=DEFAULT_DIR)
+    parser.add_argument('--check', action='store_true', help="Só mostra o relatório, sem gravar")
+    args = parser.parse_args()
+
+    json_files = sorted(glob.glob(os.path.join(args.directory, '*_questoes.json')))
+    if not json_files:
+        print(f"AVISO: Nenhum arquivo *_questoes.json encontrado em {args.directory}")
+        return 1
+
+    totals = [0] * 7
+    for json_path in json_files:
+        try:
+            result = normalize_file(json_path, write=not args.check)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"❌ {os.path.basename(json_path)}: {e}")
+            continue
+        totals = [total + value for total, value in zip(totals, result)]
+        print(f"{'✅' if result[0] else '•'} {os.path.basename(json_path)}: {result[0]} questões alteradas, "
+              f"{format_savings(*result[1:5])}")
+
+    print(f"\nTotal: {totals[0]} questões alteradas, {format_savings(*totals[1:5])}")
+    # O arquivo cresce com o enunciado_texto, que fica no servidor e não vai no payload
+    print(f"Arquivos: {totals[5] / 1024:.0f} KB -> {totals[6] / 1024:.0f} KB (com enunciado_texto)")
+    if args.check:
+        print("(--check: nada foi gravado)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())